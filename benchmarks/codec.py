@@ -0,0 +1,50 @@
+"""Time JSON decoding and encoding of Serper responses with each installed codec.
+
+Encoding is also timed with FastMCP's default result conversion,
+``pydantic_core.to_json(indent=2)``, for comparison. Recorded response
+bodies can be passed as files; synthetic ones are used otherwise. Run from
+the repository root::
+
+    python -m benchmarks.codec [response.json ...]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+import pydantic_core
+
+from benchmarks.payloads import RESPONSES
+from codec import available, get_codec
+
+
+def bodies(paths: list[str]) -> dict[str, bytes]:
+    if paths:
+        return {Path(p).stem: Path(p).read_bytes() for p in paths}
+    stdlib = get_codec("json")
+    return {
+        f"{endpoint}/{num}": stdlib.dumps(make("python asyncio", num))
+        for endpoint, make in RESPONSES.items()
+        for num in (10, 20)
+    }
+
+
+def main(paths: list[str], loops: int = 1000) -> None:
+    codecs = [get_codec(name) for name in available()]
+    header = " ".join(f"{c.name + ' dec/enc us':>20}" for c in codecs)
+    print(f"{'payload':<12} {'bytes':>6}  {header} {'fastmcp enc us':>15}")
+    for label, body in bodies(paths).items():
+        data = get_codec("json").loads(body)
+        cells = []
+        for c in codecs:
+            dec = timeit.timeit(lambda: c.loads(body), number=loops) / loops * 1e6
+            enc = timeit.timeit(lambda: c.dumps(data), number=loops) / loops * 1e6
+            cells.append(f"{dec:>9.1f} /{enc:>9.1f}")
+        fastmcp = timeit.timeit(
+            lambda: pydantic_core.to_json(data, fallback=str, indent=2), number=loops
+        ) / loops * 1e6
+        print(f"{label:<12} {len(body):>6}  " + " ".join(cells) + f" {fastmcp:>15.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
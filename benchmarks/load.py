@@ -0,0 +1,160 @@
+"""Load-test the MCP streamable-http endpoint with concurrent clients.
+
+Each client opens its own MCP session and calls a tool in a closed loop
+until the run ends. The report gives throughput, latency percentiles,
+error count and, when the server PID is known, its resident memory.
+``--spawn`` starts the mock upstream and the server itself, so no real
+Serper credits are used::
+
+    python -m benchmarks.load --spawn --clients 50 --duration 30 --distinct 200
+    python -m benchmarks.load --url http://127.0.0.1:8080/mcp --server-pid 1234
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_mb(pid: int) -> tuple[float, float] | None:
+    """Current and peak resident memory of a process, from /proc."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    values = {}
+    for line in status.splitlines():
+        key, _, rest = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = int(rest.split()[0]) / 1024
+    return values.get("VmRSS", 0.0), values.get("VmHWM", 0.0)
+
+
+async def client(url, tool, queries, num, stop_at, seed, latencies, errors):
+    rng = random.Random(seed)
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.monotonic() < stop_at:
+                payload = {"q": rng.choice(queries), "num": num}
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, {"payload": payload})
+                except Exception:
+                    errors.append(1)
+                    continue
+                latencies.append(time.perf_counter() - start)
+                text = result.content[0].text if result.content else ""
+                if result.isError or text.lstrip("{ \n").startswith('"error"'):
+                    errors.append(1)
+
+
+async def wait_for_port(url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        while True:
+            try:
+                await http.get(url, timeout=1)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def run(args) -> None:
+    procs = []
+    url, pid = args.url, args.server_pid
+    try:
+        if args.spawn:
+            mock_port, server_port = args.mock_port, args.server_port
+            procs.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "benchmarks.mock_serper", "--port", str(mock_port),
+                     "--median-ms", str(args.median_ms), "--error-rate", str(args.error_rate),
+                     "--throttle-rate", str(args.throttle_rate), "--seed", "0"],
+                    cwd=ROOT,
+                )
+            )
+            env = dict(
+                os.environ,
+                SERPER_BASE_URL=f"http://127.0.0.1:{mock_port}",
+                SERPER_API_KEY=os.getenv("SERPER_API_KEY", "mock"),
+                PORT=str(server_port),
+            )
+            server = subprocess.Popen(
+                [sys.executable, "server.py"], cwd=ROOT, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            procs.append(server)
+            url, pid = f"http://127.0.0.1:{server_port}/mcp", server.pid
+            await wait_for_port(f"http://127.0.0.1:{mock_port}/_stats")
+            await wait_for_port(url)
+
+        queries = [f"benchmark query {i}" for i in range(args.distinct)]
+        latencies: list[float] = []
+        errors: list[int] = []
+        started = time.monotonic()
+        stop_at = started + args.duration
+        await asyncio.gather(
+            *(
+                client(url, args.tool, queries, args.num, stop_at, i, latencies, errors)
+                for i in range(args.clients)
+            )
+        )
+        elapsed = time.monotonic() - started
+        ordered = sorted(latencies)
+        print(f"tool={args.tool} clients={args.clients} duration={elapsed:.1f}s distinct={args.distinct}")
+        print(f"requests={len(latencies)} errors={len(errors)} rps={len(latencies) / elapsed:.1f}")
+        print(
+            "latency ms: "
+            + " ".join(
+                f"p{p}={percentile(ordered, p) * 1000:.1f}" for p in (50, 95, 99)
+            )
+            + f" max={(ordered[-1] if ordered else 0) * 1000:.1f}"
+        )
+        memory = rss_mb(pid) if pid else None
+        if memory:
+            print(f"server rss={memory[0]:.1f}MB peak={memory[1]:.1f}MB")
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080/mcp")
+    parser.add_argument("--server-pid", type=int, default=None, help="report this process's memory")
+    parser.add_argument("--tool", default="search", choices=("search", "news", "images"))
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--distinct", type=int, default=100, help="number of distinct queries")
+    parser.add_argument("--num", type=int, default=10)
+    parser.add_argument("--spawn", action="store_true", help="start the mock and server")
+    parser.add_argument("--mock-port", type=int, default=9000)
+    parser.add_argument("--server-port", type=int, default=8081)
+    parser.add_argument("--median-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Local stand-in for google.serper.dev.
+
+Serves ``/search``, ``/news`` and ``/images`` with synthetic payloads of
+realistic size. Latency is log-normal around a configurable median, and a
+fraction of requests can be answered with 500s or 429s. Point the server at
+it with ``SERPER_BASE_URL``::
+
+    python -m benchmarks.mock_serper --port 9000 --median-ms 300 --error-rate 0.01
+    SERPER_BASE_URL=http://127.0.0.1:9000 SERPER_API_KEY=mock python server.py
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from benchmarks.payloads import RESPONSES
+
+
+def create_app(
+    median_ms: float = 300,
+    sigma: float = 0.5,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    retry_after: float = 1.0,
+    seed: int | None = None,
+) -> Starlette:
+    rng = random.Random(seed)
+    counts = {"requests": 0, "errors": 0, "throttled": 0}
+
+    async def serve(request: Request) -> Response:
+        endpoint = request.path_params["endpoint"]
+        if endpoint not in RESPONSES:
+            return JSONResponse({"message": "Not found"}, status_code=404)
+        if not request.headers.get("x-api-key"):
+            return JSONResponse({"message": "Unauthorized."}, status_code=403)
+        counts["requests"] += 1
+        payload = json.loads(await request.body())
+        await asyncio.sleep(median_ms / 1000 * math.exp(rng.gauss(0, sigma)))
+        roll = rng.random()
+        if roll < throttle_rate:
+            counts["throttled"] += 1
+            return JSONResponse(
+                {"message": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": f"{retry_after:g}"},
+            )
+        if roll < throttle_rate + error_rate:
+            counts["errors"] += 1
+            return JSONResponse({"message": "Internal error"}, status_code=500)
+        body = RESPONSES[endpoint](payload.get("q", ""), int(payload.get("num", 10)))
+        return JSONResponse(body)
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse(counts)
+
+    return Starlette(
+        routes=[
+            Route("/_stats", stats, methods=["GET"]),
+            Route("/{endpoint}", serve, methods=["POST"]),
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--median-ms", type=float, default=300, help="median latency")
+    parser.add_argument("--sigma", type=float, default=0.5, help="log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429s")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After on 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    app = create_app(
+        args.median_ms, args.sigma, args.error_rate, args.throttle_rate, args.retry_after, args.seed
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare the decoded tool result path with raw passthrough.
+
+The decoded path parses the upstream body into dicts and lets FastMCP
+re-encode them as text content; passthrough hands the body over as text.
+Peak memory is measured with tracemalloc for a single conversion. Run from
+the repository root::
+
+    python -m benchmarks.passthrough
+"""
+
+import json
+import timeit
+import tracemalloc
+
+from mcp.server.fastmcp.utilities.func_metadata import _convert_to_content
+from mcp.types import TextContent
+
+from benchmarks.payloads import RESPONSES
+
+
+def decoded(body: bytes):
+    return _convert_to_content(json.loads(body))
+
+
+def passthrough(body: bytes):
+    return _convert_to_content(TextContent(type="text", text=body.decode()))
+
+
+def peak_bytes(fn, body: bytes) -> int:
+    tracemalloc.start()
+    fn(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(loops: int = 500) -> None:
+    print(
+        f"{'tool':<8} {'num':>3} {'body B':>8} {'dec us':>8} {'raw us':>8} "
+        f"{'dec peak':>9} {'raw peak':>9}"
+    )
+    for endpoint, make in RESPONSES.items():
+        for num in (10, 20):
+            body = json.dumps(make("python asyncio", num), separators=(",", ":")).encode()
+            dec_us = timeit.timeit(lambda: decoded(body), number=loops) / loops * 1e6
+            raw_us = timeit.timeit(lambda: passthrough(body), number=loops) / loops * 1e6
+            print(
+                f"{endpoint:<8} {num:>3} {len(body):>8} {dec_us:>8.1f} {raw_us:>8.1f} "
+                f"{peak_bytes(decoded, body):>9} {peak_bytes(passthrough, body):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
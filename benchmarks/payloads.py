@@ -0,0 +1,131 @@
+"""Synthetic Serper responses with realistic shape and size."""
+
+import random
+
+WORDS = (
+    "python asyncio event loop performance guide tutorial release notes api "
+    "server client cache latency benchmark docs example pattern library "
+    "framework news update security review analysis open source community"
+).split()
+
+DOMAINS = (
+    "docs.python.org", "realpython.com", "stackoverflow.com", "github.com",
+    "medium.com", "en.wikipedia.org", "dev.to", "reuters.com", "theverge.com",
+)
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _url(rng: random.Random) -> str:
+    path = "/".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+    return f"https://{rng.choice(DOMAINS)}/{path}"
+
+
+def _params(q: str, num: int, kind: str) -> dict:
+    return {"q": q, "type": kind, "num": num, "engine": "google"}
+
+
+def search_response(q: str, num: int = 10, seed: int = 0) -> dict:
+    rng = random.Random(f"search:{q}:{seed}")
+    organic = []
+    for position in range(1, num + 1):
+        item = {
+            "title": _words(rng, 8).title(),
+            "link": _url(rng),
+            "snippet": _words(rng, 32).capitalize() + ".",
+            "position": position,
+        }
+        if rng.random() < 0.4:
+            item["date"] = f"{rng.randint(1, 28)} Mar 2026"
+        if rng.random() < 0.3:
+            item["sitelinks"] = [
+                {"title": _words(rng, 3).title(), "link": _url(rng)} for _ in range(4)
+            ]
+        if rng.random() < 0.2:
+            item["attributes"] = {"Rating": "4.6", "Reviews": str(rng.randint(10, 9999))}
+        organic.append(item)
+    return {
+        "searchParameters": _params(q, num, "search"),
+        "knowledgeGraph": {
+            "title": q.title(),
+            "type": "Programming language",
+            "website": _url(rng),
+            "imageUrl": _url(rng) + ".png",
+            "description": _words(rng, 45).capitalize() + ".",
+            "descriptionSource": "Wikipedia",
+            "descriptionLink": _url(rng),
+            "attributes": {_words(rng, 2).title(): _words(rng, 4) for _ in range(6)},
+        },
+        "answerBox": {"title": _words(rng, 6).title(), "snippet": _words(rng, 40), "link": _url(rng)},
+        "organic": organic,
+        "peopleAlsoAsk": [
+            {
+                "question": _words(rng, 7).capitalize() + "?",
+                "snippet": _words(rng, 35),
+                "title": _words(rng, 6).title(),
+                "link": _url(rng),
+            }
+            for _ in range(4)
+        ],
+        "relatedSearches": [{"query": _words(rng, 4)} for _ in range(8)],
+        "credits": 1,
+    }
+
+
+def news_response(q: str, num: int = 10, seed: int = 0) -> dict:
+    rng = random.Random(f"news:{q}:{seed}")
+    return {
+        "searchParameters": _params(q, num, "news"),
+        "news": [
+            {
+                "title": _words(rng, 10).title(),
+                "link": _url(rng),
+                "snippet": _words(rng, 28).capitalize() + "...",
+                "date": f"{rng.randint(1, 23)} hours ago",
+                "source": rng.choice(DOMAINS).split(".")[0].title(),
+                "imageUrl": "https://encrypted-tbn0.gstatic.com/images?q=tbn:" + "".join(
+                    rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+                    for _ in range(90)
+                ),
+                "position": position,
+            }
+            for position in range(1, num + 1)
+        ],
+        "credits": 1,
+    }
+
+
+def images_response(q: str, num: int = 10, seed: int = 0) -> dict:
+    rng = random.Random(f"images:{q}:{seed}")
+    images = []
+    for position in range(1, num + 1):
+        width, height = rng.choice(((1920, 1080), (1200, 800), (800, 600), (640, 640)))
+        images.append(
+            {
+                "title": _words(rng, 9).title(),
+                "imageUrl": _url(rng) + ".jpg",
+                "imageWidth": width,
+                "imageHeight": height,
+                "thumbnailUrl": "https://encrypted-tbn0.gstatic.com/images?q=tbn:" + "".join(
+                    rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+                    for _ in range(90)
+                ),
+                "thumbnailWidth": width // 6,
+                "thumbnailHeight": height // 6,
+                "source": rng.choice(DOMAINS),
+                "domain": rng.choice(DOMAINS),
+                "link": _url(rng),
+                "googleUrl": "https://www.google.com/imgres?imgurl=" + _url(rng) + "&tbnid=" + str(rng.getrandbits(64)),
+                "position": position,
+            }
+        )
+    return {"searchParameters": _params(q, num, "images"), "images": images, "credits": 1}
+
+
+RESPONSES = {
+    "search": search_response,
+    "news": news_response,
+    "images": images_response,
+}
@@ -0,0 +1,37 @@
+"""Compare response size and JSON encode time with and without projection.
+
+The projected timing includes the projection itself. Run from the
+repository root::
+
+    python -m benchmarks.projection
+"""
+
+import json
+import timeit
+
+from benchmarks.payloads import RESPONSES
+from projection import DEFAULT_FIELDS, DEFAULT_SECTIONS, project
+
+
+def main(num: int = 10, loops: int = 2000) -> None:
+    print(f"{'tool':<8} {'full B':>8} {'proj B':>8} {'saved':>7} {'full us':>8} {'proj us':>8}")
+    for endpoint, make in RESPONSES.items():
+        data = make("python asyncio", num)
+        trimmed = project(endpoint, data, DEFAULT_SECTIONS[endpoint], DEFAULT_FIELDS[endpoint])
+        full_bytes = len(json.dumps(data).encode())
+        proj_bytes = len(json.dumps(trimmed).encode())
+        full_us = timeit.timeit(lambda: json.dumps(data), number=loops) / loops * 1e6
+        proj_us = timeit.timeit(
+            lambda: json.dumps(
+                project(endpoint, data, DEFAULT_SECTIONS[endpoint], DEFAULT_FIELDS[endpoint])
+            ),
+            number=loops,
+        ) / loops * 1e6
+        print(
+            f"{endpoint:<8} {full_bytes:>8} {proj_bytes:>8} "
+            f"{1 - proj_bytes / full_bytes:>6.0%} {full_us:>8.1f} {proj_us:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
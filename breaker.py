@@ -0,0 +1,116 @@
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding window of call outcomes.
+
+    A call counts against the upstream when it fails or takes longer than
+    ``slow_seconds``. Once at least ``min_calls`` outcomes are in the window
+    and the bad fraction reaches ``failure_rate``, the breaker opens and
+    rejects calls for ``open_seconds``. It then lets ``half_open_calls``
+    trial calls through: one good trial closes it again, one bad trial
+    reopens it.
+
+    Every state change starts a new generation. ``allow`` hands out the
+    current generation as a ticket, and ``record`` ignores outcomes whose
+    ticket is stale, so a call admitted before the breaker opened cannot
+    close it or use up a half-open trial slot.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        slow_seconds: float,
+        window: int,
+        min_calls: int,
+        open_seconds: float,
+        half_open_calls: int,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trials = 0
+        self.generation = 0
+        self.rejected = 0
+        self.opened = 0
+        self._outcomes: deque[bool] = deque(maxlen=window)
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_rate > 0
+
+    def allow(self) -> int:
+        """Raise ``CircuitOpen`` unless a call may go upstream now.
+
+        Returns the ticket to pass to ``record`` once the call is done.
+        """
+        if not self.enabled or self.state == CLOSED:
+            return self.generation
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpen(f"circuit open for {self.name}")
+            self._enter(HALF_OPEN)
+            self.trials = 0
+        if self.trials >= self.half_open_calls:
+            self.rejected += 1
+            raise CircuitOpen(f"circuit half-open for {self.name}")
+        self.trials += 1
+        return self.generation
+
+    def record(self, ticket: int, ok: bool | None, latency: float = 0.0) -> None:
+        """Record a call outcome; ``None`` releases a call without judging it."""
+        if not self.enabled or ticket != self.generation:
+            return
+        if self.state == HALF_OPEN:
+            self.trials -= 1
+        if ok is None:
+            return
+        bad = not ok or latency > self.slow_seconds
+        if self.state == HALF_OPEN:
+            if bad:
+                self._open()
+            else:
+                self._enter(CLOSED)
+                self._outcomes.clear()
+            return
+        self._outcomes.append(bad)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def _enter(self, state: str) -> None:
+        self.state = state
+        self.generation += 1
+
+    def _open(self) -> None:
+        self._enter(OPEN)
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "state_code": STATE_CODES[self.state],
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class CreditLedger:
+    """Count Serper credits per client and per tool over fixed time windows.
+
+    ``limits`` maps a scope (``"client"`` or ``"tool"``) to ``(soft, hard)``
+    credit limits per window; 0 disables a limit. Crossing the soft limit
+    logs a warning once per window, and reaching the hard limit makes
+    ``check`` raise ``BudgetExceeded`` until the window rolls over. Cache
+    hits are counted separately as free lookups. Only the current window is
+    kept, and it is written to ``path`` at most every ``persist_interval``
+    seconds so counts survive a restart.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        limits: dict[str, tuple[float, float]],
+        path: str = "",
+        persist_interval: float = 60.0,
+    ):
+        self.window = window
+        self.limits = limits
+        self.path = path
+        self.persist_interval = persist_interval
+        self.warnings = 0
+        self.rejections = 0
+        self._window_id = self._current_window()
+        # "scope:name" -> [credits, upstream calls, free hits, warned]
+        self._usage: dict[str, list] = {}
+        self._saved = time.monotonic()
+        self._saving = False
+        if path:
+            self.load()
+
+    def _current_window(self) -> int:
+        return int(time.time() // self.window)
+
+    def _entries(self, client: str, tool: str) -> list[tuple[str, list]]:
+        window_id = self._current_window()
+        if window_id != self._window_id:
+            self._window_id = window_id
+            self._usage.clear()
+        entries = []
+        for scope, name in (("client", client), ("tool", tool)):
+            key = f"{scope}:{name}"
+            usage = self._usage.get(key)
+            if usage is None:
+                usage = self._usage[key] = [0.0, 0, 0, False]
+            entries.append((key, usage))
+        return entries
+
+    def check(self, client: str, tool: str) -> None:
+        """Raise ``BudgetExceeded`` if a paid call would break a hard limit."""
+        for key, usage in self._entries(client, tool):
+            hard = self.limits.get(key.split(":", 1)[0], (0, 0))[1]
+            if hard and usage[0] >= hard:
+                self.rejections += 1
+                raise BudgetExceeded(
+                    f"credit budget exhausted for {key} "
+                    f"({usage[0]:g}/{hard:g} per {self.window:g}s)"
+                )
+
+    def charge(self, client: str, tool: str, credits: float) -> None:
+        for key, usage in self._entries(client, tool):
+            usage[0] += credits
+            usage[1] += 1
+            soft = self.limits.get(key.split(":", 1)[0], (0, 0))[0]
+            if soft and usage[0] >= soft and not usage[3]:
+                usage[3] = True
+                self.warnings += 1
+                logger.warning(
+                    "Serper credit usage for %s reached %g (soft limit %g)", key, usage[0], soft
+                )
+        self._maybe_save()
+
+    def record_free(self, client: str, tool: str) -> None:
+        for _, usage in self._entries(client, tool):
+            usage[2] += 1
+        self._maybe_save()
+
+    def snapshot(self) -> dict:
+        return {
+            "window": self._window_id,
+            "window_seconds": self.window,
+            "usage": {
+                key: {"credits": u[0], "calls": u[1], "free_hits": u[2]}
+                for key, u in self._usage.items()
+            },
+        }
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("window") != self._window_id or data.get("window_seconds") != self.window:
+            return
+        for key, u in data.get("usage", {}).items():
+            self._usage[key] = [u["credits"], u["calls"], u["free_hits"], False]
+
+    def save(self, snapshot: dict | None = None) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot or self.snapshot(), f)
+        os.replace(tmp, self.path)
+
+    def _maybe_save(self) -> None:
+        if not self.path or self._saving:
+            return
+        if time.monotonic() - self._saved < self.persist_interval:
+            return
+        self._saved = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._saving = True
+        task = loop.create_task(asyncio.to_thread(self.save, self.snapshot()))
+        task.add_done_callback(self._saved_callback)
+
+    def _saved_callback(self, task: asyncio.Task) -> None:
+        self._saving = False
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("could not persist credit ledger: %s", task.exception())
+
+    def totals(self) -> dict:
+        """Credits, paid calls and free hits per tool in the current window."""
+        return {
+            key.split(":", 1)[1]: {"credits": u[0], "calls": u[1], "free_hits": u[2]}
+            for key, u in self._usage.items()
+            if key.startswith("tool:")
+        }
@@ -0,0 +1,265 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from codec import get_codec
+
+_key_codec = get_codec()
+
+
+def cache_key(endpoint: str, payload: dict) -> str:
+    """Build a stable cache key from an endpoint and its request payload."""
+    return endpoint + ":" + _key_codec.dumps_sorted(payload).decode()
+
+
+class ResponseCache:
+    """In-memory TTL cache with LRU eviction bounded by total stored bytes.
+
+    Values are the raw upstream response bodies, so the byte budget matches
+    what is actually held in memory. An entry is fresh for its TTL and may
+    then be served stale for ``stale_ttl`` more seconds while the caller
+    revalidates it. Expired entries are kept until evicted so they can
+    still be served as a fallback through ``get_stale``.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttls: dict[str, float],
+        default_ttl: float,
+        stale_ttl: float = 0.0,
+    ):
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.size = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, key: str) -> tuple[bytes, float] | None:
+        """Return ``(body, remaining_ttl)``; a non-positive TTL means stale."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        fresh_until, body = entry
+        remaining = fresh_until - time.monotonic()
+        if remaining <= -self.stale_ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if remaining > 0:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return body, remaining
+
+    def get_stale(self, key: str) -> bytes | None:
+        """Return an entry even if it has expired, as long as it was not evicted."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def set(
+        self, key: str, body: bytes, ttl: float, replace: Callable[[bytes], bool] | None = None
+    ) -> None:
+        """Store ``body`` for ``ttl`` seconds.
+
+        A fresh entry for ``key`` is kept instead if ``replace`` is given and
+        returns False for its body.
+        """
+        if ttl <= 0 or len(body) > self.max_bytes:
+            return
+        entry = self._entries.get(key)
+        if entry is not None:
+            if replace is not None and entry[0] > time.monotonic() and not replace(entry[1]):
+                return
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, body = self._entries.pop(key)
+        self.size -= len(body)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def compress(body: bytes) -> tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor().compress(body)
+    return "zlib", zlib.compress(body, 6)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+class DiskCache:
+    """SQLite-backed response cache that survives process restarts.
+
+    Bodies are stored compressed with an absolute expiry time. When the
+    stored size exceeds ``max_bytes``, rows past their stale window are
+    dropped first and then the rows closest to expiry until the cache is
+    back under budget. The async helpers run queries in a worker thread so
+    the event loop is never blocked on disk I/O.
+    """
+
+    def __init__(self, path: str, max_bytes: int, stale_ttl: float = 0.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, expires REAL NOT NULL, size INTEGER NOT NULL, "
+            "codec TEXT NOT NULL, body BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires)")
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str, stale: bool = False) -> tuple[bytes, float] | None:
+        """Return ``(body, remaining_ttl)`` for a usable entry, else None.
+
+        Entries within ``stale_ttl`` of expiry are returned with a
+        non-positive remaining TTL. With ``stale=True`` any row that has
+        not been compacted away is returned.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT expires, codec, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        remaining = row[0] - time.time()
+        if remaining <= -self.stale_ttl and not stale:
+            self.misses += 1
+            return None
+        try:
+            body = decompress(row[1], row[2])
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return body, remaining
+
+    def set(
+        self, key: str, body: bytes, ttl: float, replace: Callable[[bytes], bool] | None = None
+    ) -> None:
+        """Store ``body`` for ``ttl`` seconds, with ``replace`` as in ``ResponseCache.set``."""
+        if ttl <= 0:
+            return
+        codec, data = compress(body)
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size, expires, codec, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if old and replace is not None and old[1] > time.time():
+                if not self._replaces(replace, old[2], old[3]):
+                    return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, expires, size, codec, body) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, time.time() + ttl, len(data), codec, data),
+            )
+            self.size += len(data) - (old[0] if old else 0)
+            if self.size > self.max_bytes:
+                self._compact()
+
+    @staticmethod
+    def _replaces(replace: Callable[[bytes], bool], codec: str, data: bytes) -> bool:
+        try:
+            return replace(decompress(codec, data))
+        except Exception:
+            return True
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        self.compactions += 1
+        self._db.execute(
+            "DELETE FROM responses WHERE expires <= ?", (time.time() - self.stale_ttl,)
+        )
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self.size > target:
+            freed = 0
+            doomed = []
+            for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY expires"):
+                if self.size - freed <= target:
+                    break
+                doomed.append((key,))
+                freed += size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            self.size -= freed
+        self._db.execute("PRAGMA incremental_vacuum")
+
+    async def aget(self, key: str, stale: bool = False) -> tuple[bytes, float] | None:
+        return await asyncio.to_thread(self.get, key, stale)
+
+    async def aset(
+        self, key: str, body: bytes, ttl: float, replace: Callable[[bytes], bool] | None = None
+    ) -> None:
+        await asyncio.to_thread(self.set, key, body, ttl, replace)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "compactions": self.compactions,
+        }
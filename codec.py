@@ -0,0 +1,62 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _json_dumps(obj, sort_keys: bool = False) -> bytes:
+    return json.dumps(
+        obj, default=str, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys
+    ).encode()
+
+
+class JsonCodec:
+    """``loads``/``dumps`` backed by one JSON library.
+
+    ``loads`` accepts bytes or str. ``dumps`` returns compact UTF-8 bytes
+    and, like FastMCP's own result conversion, falls back to ``str`` for
+    values JSON cannot represent; ``dumps_sorted`` also sorts object keys.
+    """
+
+    __slots__ = ("name", "loads", "dumps", "dumps_sorted")
+
+    def __init__(self, name: str):
+        if name == "orjson" and orjson is not None:
+            self.loads = orjson.loads
+            self.dumps = lambda obj: orjson.dumps(obj, default=str)
+            self.dumps_sorted = lambda obj: orjson.dumps(
+                obj, default=str, option=orjson.OPT_SORT_KEYS
+            )
+        elif name == "msgspec" and msgspec is not None:
+            self.loads = msgspec.json.Decoder().decode
+            self.dumps = msgspec.json.Encoder(enc_hook=str).encode
+            self.dumps_sorted = msgspec.json.Encoder(enc_hook=str, order="sorted").encode
+        elif name == "json":
+            self.loads = json.loads
+            self.dumps = _json_dumps
+            self.dumps_sorted = lambda obj: _json_dumps(obj, sort_keys=True)
+        else:
+            raise ValueError(f"JSON codec {name!r} is not available")
+        self.name = name
+
+
+def available() -> list[str]:
+    """Installed codecs, fastest first."""
+    names = []
+    if orjson is not None:
+        names.append("orjson")
+    if msgspec is not None:
+        names.append("msgspec")
+    return names + ["json"]
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """Return the named codec, or the fastest installed one for ``"auto"``."""
+    return JsonCodec(available()[0] if name == "auto" else name)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ratelimit import TokenBucket
+
+
+class Hedger:
+    """Send a backup request when the primary is slower than usual.
+
+    The hedge delay is the configured percentile of recently observed
+    latencies for the endpoint, never below ``min_delay``. Hedges draw from
+    a shared token bucket, so at most ``max_per_second`` extra requests are
+    sent no matter how slow the upstream gets. The first successful response
+    wins and the other request is cancelled.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_delay: float,
+        max_per_second: float,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.budget = TokenBucket(max_per_second, max_per_second, 0)
+        self.sent = 0
+        self.wins = 0
+        self.skipped = 0
+        self._latencies: dict[str, deque[float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget.rate > 0
+
+    def observe(self, endpoint: str, latency: float) -> None:
+        samples = self._latencies.get(endpoint)
+        if samples is None:
+            samples = self._latencies[endpoint] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def delay(self, endpoint: str) -> float | None:
+        """Return the hedge delay, or None until enough latencies are known."""
+        samples = self._latencies.get(endpoint)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    async def run(
+        self,
+        endpoint: str,
+        send: Callable[[], Awaitable[Any]],
+        admit: Callable[[], bool] | None = None,
+    ) -> Any:
+        """Await ``send()``, hedging it with a second call if it is slow.
+
+        ``admit`` is asked just before a hedge is sent, and only once the
+        hedge budget has a token, so the caller can charge it to its own
+        rate limits; the hedge is skipped if it returns False. A skipped
+        hedge spends no tokens.
+        """
+
+        async def timed():
+            start = time.monotonic()
+            result = await send()
+            self.observe(endpoint, time.monotonic() - start)
+            return result
+
+        delay = self.delay(endpoint) if self.enabled else None
+        primary = asyncio.ensure_future(timed())
+        if delay is None:
+            return await primary
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return await primary
+        if not self.budget.available() or (admit is not None and not admit()):
+            self.skipped += 1
+            return await primary
+        self.budget.try_acquire()
+
+        self.sent += 1
+        hedge = asyncio.ensure_future(timed())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "wins": self.wins,
+            "skipped": self.skipped,
+            "delay": {endpoint: self.delay(endpoint) for endpoint in self._latencies},
+        }
@@ -0,0 +1,162 @@
+import os
+import time
+
+import httpx
+
+from ratelimit import TokenBucket
+
+STRATEGIES = ("weighted", "least_loaded")
+
+
+class NoKeyAvailable(Exception):
+    pass
+
+
+def is_key_failure(exc: BaseException) -> bool:
+    """Whether an error means the key itself is unusable (bad key or out of credits)."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return False
+    status = exc.response.status_code
+    if status in (401, 402, 403):
+        return True
+    return status == 400 and "credit" in exc.response.text.lower()
+
+
+def parse_keys(text: str) -> list[tuple[str, float]]:
+    """Parse ``key[:weight]`` entries separated by commas or newlines; ``#`` starts a comment."""
+    keys = []
+    for line in text.replace(",", "\n").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        key, _, weight = line.partition(":")
+        keys.append((key.strip(), float(weight) if weight.strip() else 1.0))
+    return keys
+
+
+class ApiKey:
+    def __init__(self, key: str, weight: float, qps: float, burst: float, max_wait: float):
+        self.key = key
+        self.label = "..." + key[-4:]
+        self.weight = max(weight, 0.0)
+        self.bucket = TokenBucket(qps, burst, max_wait)
+        self.current = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+
+class KeyPool:
+    """Spread upstream calls over several API keys.
+
+    Keys are chosen by smooth weighted round-robin or, with
+    ``least_loaded``, by fewest in-flight requests per unit of weight. Each
+    key has its own token bucket. A key that fails with an auth or credit
+    error is ejected for ``cooldown`` seconds. When ``path`` is set, the
+    key list is re-read whenever the file changes, keeping the counters of
+    keys that are still listed.
+    """
+
+    def __init__(
+        self,
+        keys: list[tuple[str, float]],
+        strategy: str = "weighted",
+        qps: float = 0.0,
+        burst: float = 0.0,
+        max_wait: float = 10.0,
+        cooldown: float = 300.0,
+        path: str = "",
+        reload_interval: float = 5.0,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown key strategy {strategy!r}; expected one of {STRATEGIES}")
+        self.strategy = strategy
+        self.qps = qps
+        self.burst = burst
+        self.max_wait = max_wait
+        self.cooldown = cooldown
+        self.path = path
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._mtime = 0.0
+        self._checked = 0.0
+        self.keys: list[ApiKey] = []
+        self.load(keys)
+        if path:
+            self.maybe_reload(force=True)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def load(self, keys: list[tuple[str, float]]) -> None:
+        existing = {k.key: k for k in self.keys}
+        loaded = []
+        for key, weight in keys:
+            api_key = existing.get(key)
+            if api_key is None:
+                api_key = ApiKey(key, weight, self.qps, self.burst or self.qps, self.max_wait)
+            api_key.weight = weight
+            loaded.append(api_key)
+        self.keys = loaded
+
+    def maybe_reload(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not self.path or (not force and now - self._checked < self.reload_interval):
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                keys = parse_keys(f.read())
+        except (OSError, ValueError):
+            return
+        self._mtime = mtime
+        self.load(keys)
+        self.reloads += 1
+
+    def choose(self) -> ApiKey:
+        self.maybe_reload()
+        now = time.monotonic()
+        available = [k for k in self.keys if k.ejected_until <= now and k.weight > 0]
+        if not available:
+            raise NoKeyAvailable("no Serper API key is available")
+        if self.strategy == "least_loaded":
+            return min(available, key=lambda k: (k.in_flight / k.weight, k.requests))
+        total = 0.0
+        best = None
+        for k in available:
+            k.current += k.weight
+            total += k.weight
+            if best is None or k.current > best.current:
+                best = k
+        best.current -= total
+        return best
+
+    def record(self, api_key: ApiKey, exc: BaseException | None) -> None:
+        api_key.requests += 1
+        if exc is None:
+            return
+        api_key.errors += 1
+        if is_key_failure(exc):
+            api_key.ejections += 1
+            api_key.ejected_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "key": k.label,
+                "weight": k.weight,
+                "in_flight": k.in_flight,
+                "requests": k.requests,
+                "errors": k.errors,
+                "ejections": k.ejections,
+                "ejected": k.ejected_until > now,
+                "queue_depth": k.bucket.waiting,
+            }
+            for k in self.keys
+        ]
@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+@dataclass(slots=True)
+class SearchParameters:
+    q: str | None = None
+    type: str | None = None
+    engine: str | None = None
+    num: int | None = None
+    page: int | None = None
+    gl: str | None = None
+    hl: str | None = None
+    location: str | None = None
+    autocorrect: bool | None = None
+
+
+@dataclass(slots=True)
+class OrganicResult:
+    title: str | None = None
+    link: str | None = None
+    snippet: str | None = None
+    date: str | None = None
+    position: int | None = None
+    sitelinks: list[dict[str, Any]] | None = None
+    attributes: dict[str, Any] | None = None
+
+
+@dataclass(slots=True)
+class NewsResult:
+    title: str | None = None
+    link: str | None = None
+    snippet: str | None = None
+    date: str | None = None
+    source: str | None = None
+    imageUrl: str | None = None
+    position: int | None = None
+
+
+@dataclass(slots=True)
+class ImageResult:
+    title: str | None = None
+    imageUrl: str | None = None
+    imageWidth: int | None = None
+    imageHeight: int | None = None
+    thumbnailUrl: str | None = None
+    thumbnailWidth: int | None = None
+    thumbnailHeight: int | None = None
+    source: str | None = None
+    domain: str | None = None
+    link: str | None = None
+    googleUrl: str | None = None
+    position: int | None = None
+
+
+class Response(BaseModel):
+    """Output schema of a tool result.
+
+    The models only describe results: tools build and return plain dicts,
+    which FastMCP validates against the schema when structured output is
+    enabled. Every field is optional so projected responses still validate,
+    and unknown keys are allowed. Sections only some queries return, such
+    as ``knowledgeGraph``, stay plain JSON objects. ``error`` is set instead
+    of results when a call fails.
+    """
+
+    model_config = ConfigDict(extra="allow")
+
+    searchParameters: SearchParameters | None = None
+    credits: int | None = None
+    error: str | None = None
+
+
+class SearchResponse(Response):
+    organic: list[OrganicResult] | None = None
+    knowledgeGraph: dict[str, Any] | None = None
+    answerBox: dict[str, Any] | None = None
+    peopleAlsoAsk: list[dict[str, Any]] | None = None
+    relatedSearches: list[dict[str, Any]] | None = None
+
+
+class NewsResponse(Response):
+    news: list[NewsResult] | None = None
+
+
+class ImagesResponse(Response):
+    images: list[ImageResult] | None = None
+
+
+class SearchAllResponse(BaseModel):
+    """One query's results from several verticals, keyed by vertical.
+
+    Verticals that were not requested are omitted; one that failed has its
+    ``error`` set while the others keep their results.
+    """
+
+    search: SearchResponse | None = None
+    news: NewsResponse | None = None
+    images: ImagesResponse | None = None
+
@@ -0,0 +1,88 @@
+import re
+import unicodedata
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+# Google treats these operators case-sensitively; lowercasing them would
+# turn them into plain search terms.
+_CASE_SENSITIVE = re.compile(r"^(OR|AND|AROUND\(\d+\))$")
+
+
+class QueryNormalizer:
+    """Canonicalize payloads so equivalent queries share a cache key.
+
+    Queries are NFC-normalized and have their whitespace collapsed, and
+    with ``fold_case`` they are case-folded except for boolean operators.
+    Payload keys are put in a stable order. The normalizer also records
+    which raw queries collapsed into each canonical one, within a bounded
+    LRU of ``max_keys`` canonical queries and ``max_variants`` raw variants
+    each.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        fold_case: bool = True,
+        max_keys: int = 10000,
+        max_variants: int = 64,
+    ):
+        self.enabled = enabled
+        self.fold_case = fold_case
+        self.max_keys = max_keys
+        self.max_variants = max_variants
+        self.requests = 0
+        self.rewritten = 0
+        self._variants: OrderedDict[str, set[str]] = OrderedDict()
+
+    def normalize_query(self, q: str) -> str:
+        q = _WHITESPACE.sub(" ", unicodedata.normalize("NFC", q)).strip()
+        if self.fold_case:
+            q = " ".join(
+                word if _CASE_SENSITIVE.match(word) else word.casefold() for word in q.split(" ")
+            )
+        return q
+
+    def canonical(self, payload: dict) -> dict:
+        """Return the canonical form of a request payload."""
+        if not self.enabled:
+            return payload
+        raw = payload.get("q")
+        out = {k: payload[k] for k in sorted(payload)}
+        if isinstance(raw, str):
+            q = out["q"] = self.normalize_query(raw)
+            self._record(raw, q)
+        return out
+
+    def _record(self, raw: str, q: str) -> None:
+        self.requests += 1
+        if raw != q:
+            self.rewritten += 1
+        variants = self._variants.get(q)
+        if variants is None:
+            variants = self._variants[q] = set()
+            if len(self._variants) > self.max_keys:
+                self._variants.popitem(last=False)
+        else:
+            self._variants.move_to_end(q)
+        if len(variants) < self.max_variants:
+            variants.add(raw)
+
+    def report(self, top: int = 50) -> dict:
+        """Summarize how many raw queries mapped to each canonical query."""
+        collapsed = sorted(
+            ((q, len(v)) for q, v in self._variants.items() if len(v) > 1),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        raw_total = sum(len(v) for v in self._variants.values())
+        return {
+            "requests": self.requests,
+            "rewritten": self.rewritten,
+            "canonical_queries": len(self._variants),
+            "raw_queries": raw_total,
+            "collapsed": raw_total - len(self._variants),
+            "top": [
+                {"canonical": q, "variants": count, "examples": sorted(self._variants[q])[:5]}
+                for q, count in collapsed[:top]
+            ],
+        }
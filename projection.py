@@ -0,0 +1,92 @@
+import re
+
+ALL = "*"
+MAX_NUM = 20
+
+RESULT_SECTIONS = {
+    "search": "organic",
+    "news": "news",
+    "images": "images",
+}
+
+DEFAULT_SECTIONS = {
+    "search": ("searchParameters", "answerBox", "knowledgeGraph", "organic"),
+    "news": ("searchParameters", "news"),
+    "images": ("searchParameters", "images"),
+}
+
+DEFAULT_FIELDS = {
+    "search": ("position", "title", "link", "snippet", "date"),
+    "news": ("position", "title", "link", "snippet", "date", "source"),
+    "images": ("position", "title", "imageUrl", "link", "source"),
+}
+
+# searchParameters is a flat object, so the echoed num can be read from the
+# raw body without decoding it.
+_ECHOED_NUM = re.compile(rb'"searchParameters"\s*:\s*\{[^{}]*?"num"\s*:\s*(\d+)')
+
+
+def project(endpoint: str, data: dict, sections=None, fields=None) -> dict:
+    """Trim a Serper response to the requested top-level sections and result fields.
+
+    ``sections`` selects top-level keys. ``fields`` selects keys inside the
+    items of the endpoint's result list, such as ``organic``; every other
+    section, such as ``peopleAlsoAsk`` or ``knowledgeGraph``, is kept whole.
+    ``None`` or ``["*"]`` keeps everything at that level. The input is
+    never modified.
+    """
+    keep_all_sections = sections is None or ALL in sections
+    keep_all_fields = fields is None or ALL in fields
+    if keep_all_sections and keep_all_fields:
+        return data
+    results = RESULT_SECTIONS[endpoint]
+    out = {}
+    for name, value in data.items():
+        if not keep_all_sections and name not in sections:
+            continue
+        if not keep_all_fields and name == results and isinstance(value, list):
+            value = [
+                {k: v for k, v in item.items() if k in fields} if isinstance(item, dict) else item
+                for item in value
+            ]
+        out[name] = value
+    return out
+
+
+def keeps_all(sections=None, fields=None) -> bool:
+    """Whether ``project`` would return the response unchanged."""
+    return (sections is None or ALL in sections) and (fields is None or ALL in fields)
+
+
+def echoed_num(body: bytes) -> int | None:
+    """Read the echoed ``num`` from a raw response body, or None if it has none."""
+    match = _ECHOED_NUM.search(body)
+    return int(match.group(1)) if match else None
+
+
+def result_count(endpoint: str, data: dict) -> int:
+    """How many results the response was fetched for, from its echoed ``num``.
+
+    Without an echoed ``num`` the length of the result list is used, and a
+    response with no results at all is taken to answer any ``num``.
+    """
+    params = data.get("searchParameters")
+    if isinstance(params, dict) and isinstance(params.get("num"), int):
+        return params["num"]
+    return len(data.get(RESULT_SECTIONS[endpoint]) or ()) or MAX_NUM
+
+
+def limit_results(endpoint: str, data: dict, num: int) -> dict:
+    """Cut the endpoint's result list down to ``num`` items without modifying ``data``.
+
+    The echoed ``searchParameters.num`` is lowered to ``num`` as well, so
+    the response reads as if it had been fetched for ``num`` results.
+    """
+    section = RESULT_SECTIONS[endpoint]
+    items = data.get(section)
+    params = data.get("searchParameters")
+    if isinstance(items, list) and len(items) > num:
+        data = {**data, section: items[:num]}
+    if isinstance(params, dict) and isinstance(params.get("num"), int) and params["num"] > num:
+        data = {**data, "searchParameters": {**params, "num": num}}
+    return data
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class TokenBucket:
+    """Token bucket that queues callers instead of rejecting them.
+
+    Each ``acquire`` reserves the next token, possibly driving the balance
+    negative, and sleeps until that token has been refilled. Reservations
+    are therefore served in arrival order. Callers whose wait would exceed
+    ``max_wait`` are rejected up front with ``RateLimitExceeded``.
+    """
+
+    def __init__(self, rate: float, burst: float, max_wait: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_wait = max_wait
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now."""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens < 1:
+            self.rejected += 1
+            return False
+        self.tokens -= 1
+        self.acquired += 1
+        return True
+
+    def available(self) -> bool:
+        """Whether a token is available right now, without taking it."""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        return self.tokens >= 1
+
+    async def acquire(self, max_wait: float | None = None) -> float:
+        """Wait for a token and return the time spent queued.
+
+        ``max_wait`` can only tighten the bucket's own limit, e.g. to the
+        time left before a caller's deadline.
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        limit = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        if wait > limit:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                f"rate limit queue wait {wait:.2f}s exceeds {limit:g}s"
+            )
+        self.tokens -= 1
+        if wait > 0:
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.tokens += 1
+                raise
+            finally:
+                self.waiting -= 1
+        self.acquired += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "qps": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_total, 6),
+            "wait_seconds_max": round(self.wait_max, 6),
+        }
+
+
+def try_acquire_all(*buckets: TokenBucket) -> bool:
+    """Take a token from every bucket, or from none if any of them is empty.
+
+    A refusal is left to the caller to count; it does not add to the
+    buckets' ``rejected``.
+    """
+    if not all(bucket.available() for bucket in buckets):
+        return False
+    for bucket in buckets:
+        bucket.try_acquire()
+    return True
@@ -0,0 +1,96 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Return the delay requested by a ``Retry-After`` header, if any."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+def is_upstream_fault(exc: BaseException) -> bool:
+    """Whether a failure reflects upstream health rather than the request."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter.
+
+    Only transport errors and retryable HTTP statuses are retried. A retry
+    is attempted only when its delay still fits before the caller's
+    deadline. A ``Retry-After`` header replaces the computed backoff.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        requested = retry_after(exc)
+        if requested is not None:
+            return requested
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def run(self, fn: Callable[[float], Awaitable[Any]], deadline: float) -> Any:
+        """Call ``fn(remaining_seconds)`` until it succeeds or retrying stops."""
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise httpx.TimeoutException("deadline exceeded")
+            try:
+                result = await fn(remaining)
+            except Exception as e:
+                attempt += 1
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    if attempt > 1:
+                        self.exhausted += 1
+                    raise
+                delay = self.backoff(attempt - 1, e)
+                if time.monotonic() + delay >= deadline:
+                    self.exhausted += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            if attempt:
+                self.recovered += 1
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+        }
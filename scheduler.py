@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class Shed(Exception):
+    pass
+
+
+class Scheduler:
+    """Bounded-concurrency gate with weighted fair queuing and load shedding.
+
+    Up to ``concurrency`` callers hold a slot at once. The rest queue under
+    a WFQ finish tag per flow, so each (session, priority) flow gets a
+    share of slots in proportion to its priority weight and one busy
+    session cannot starve the others. Callers are shed up front when the
+    queue is full or when the estimated queue wait plus service time would
+    overrun their deadline. A queued caller whose deadline passes before it
+    reaches the front is shed instead of being admitted.
+    """
+
+    def __init__(self, concurrency: int, max_queue: int, weights: dict[str, float]):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.weights = weights
+        self.active = 0
+        self.service_time = 0.0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "deadline": 0, "expired": 0}
+        self._queue: list[tuple[float, int, str, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._virtual = 0.0
+        self._finish: dict[tuple[str, str], float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.concurrency > 0
+
+    def depth(self, priority: str | None = None) -> int:
+        return sum(
+            1 for entry in self._queue
+            if not entry[4].done() and (priority is None or entry[2] == priority)
+        )
+
+    async def acquire(self, session: str, priority: str, deadline: float) -> float:
+        """Wait for a slot and return the time spent queued."""
+        if not self.enabled:
+            return 0.0
+        if self.active < self.concurrency and not self._queue:
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+
+        now = time.monotonic()
+        flow = (session, priority)
+        tag = max(self._virtual, self._finish.get(flow, 0.0)) + 1 / self.weights.get(priority, 1.0)
+        ahead = sum(1 for entry in self._queue if entry[0] <= tag and not entry[4].done())
+        expected = (ahead // self.concurrency + 1) * self.service_time
+        if now + expected > deadline:
+            self.shed["deadline"] += 1
+            raise Shed(f"shed: expected queue wait {expected:.2f}s exceeds the deadline")
+        if self.depth() >= self.max_queue:
+            self._evict_after(tag)
+
+        self._finish[flow] = tag
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (tag, next(self._seq), priority, deadline, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+        self.admitted += 1
+        return time.monotonic() - now
+
+    def _evict_after(self, tag: float) -> None:
+        """Make room by shedding the queued caller furthest back, or refuse this one."""
+        live = [entry for entry in self._queue if not entry[4].done()]
+        worst = max(live, default=None)
+        self.shed["queue_full"] += 1
+        if worst is None or worst[0] <= tag:
+            raise Shed("shed: upstream queue is full")
+        worst[4].set_exception(Shed("shed: displaced by higher-priority work"))
+
+    def release(self, held: float) -> None:
+        if not self.enabled:
+            return
+        self.service_time = held if not self.service_time else 0.8 * self.service_time + 0.2 * held
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._queue and self.active < self.concurrency:
+            tag, _, _, deadline, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._virtual = tag
+            if deadline <= now:
+                self.shed["expired"] += 1
+                future.set_exception(Shed("shed: deadline passed while queued"))
+                continue
+            self.active += 1
+            future.set_result(None)
+        if not self._queue:
+            self._finish.clear()
@@ -1,10 +1,138 @@
+import asyncio
+import functools
+import inspect
 import os
-import requests
+import time
+from contextvars import ContextVar
+from typing import Annotated, Literal
+
+import httpx
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult, TextContent
 from pydantic import BaseModel, Field
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from breaker import CircuitBreaker, CircuitOpen
+from budget import BudgetExceeded, CreditLedger
+from cache import DiskCache, ResponseCache, cache_key
+from codec import get_codec
+from hedge import Hedger
+from keys import KeyPool, NoKeyAvailable, is_key_failure, parse_keys
+from metrics import BYTES_BUCKETS, Counter, Gauge, Registry
+from models import ImagesResponse, NewsResponse, SearchAllResponse, SearchResponse
+from normalize import QueryNormalizer
+from projection import (
+    DEFAULT_FIELDS,
+    DEFAULT_SECTIONS,
+    MAX_NUM,
+    echoed_num,
+    keeps_all,
+    limit_results,
+    project,
+    result_count,
+)
+from ratelimit import RateLimitExceeded, TokenBucket, try_acquire_all
+from retry import RetryPolicy, is_upstream_fault
+from scheduler import Scheduler, Shed
+from singleflight import SingleFlight
+from tracing import (
+    SPAN_KIND_CLIENT,
+    SPAN_KIND_SERVER,
+    FileExporter,
+    OTLPHttpExporter,
+    Tracer,
+)
+
+
+ENDPOINTS = ("search", "news", "images")
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
 
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
+SERPER_API_KEYS = os.getenv("SERPER_API_KEYS", "")
+SERPER_API_KEYS_FILE = os.getenv("SERPER_API_KEYS_FILE", "")
+SERPER_KEY_STRATEGY = os.getenv("SERPER_KEY_STRATEGY", "weighted")
+SERPER_KEY_QPS = float(os.getenv("SERPER_KEY_QPS", "0"))
+SERPER_KEY_BURST = float(os.getenv("SERPER_KEY_BURST", SERPER_KEY_QPS))
+SERPER_KEY_COOLDOWN = float(os.getenv("SERPER_KEY_COOLDOWN", "300"))
+SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", "30"))
+SERPER_DEADLINE = float(os.getenv("SERPER_DEADLINE", SERPER_TIMEOUT))
+SERPER_TOOL_DEADLINES = {
+    tool: float(os.getenv(f"SERPER_DEADLINE_{tool.upper()}", SERPER_DEADLINE))
+    for tool in ("search", "news", "images", "search_all")
+}
+# SERPER_BATCH_ITEM_TIMEOUT is the older name of SERPER_DEADLINE_BATCH_SEARCH.
+SERPER_TOOL_DEADLINES["batch_search"] = float(
+    os.getenv(
+        "SERPER_DEADLINE_BATCH_SEARCH", os.getenv("SERPER_BATCH_ITEM_TIMEOUT", SERPER_DEADLINE)
+    )
+)
+SERPER_MAX_CONNECTIONS = int(os.getenv("SERPER_MAX_CONNECTIONS", "100"))
+SERPER_MAX_KEEPALIVE = int(os.getenv("SERPER_MAX_KEEPALIVE", "20"))
+SERPER_HTTP2 = env_flag("SERPER_HTTP2")
+SERPER_CACHE_MAX_BYTES = int(os.getenv("SERPER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SERPER_CACHE_TTL = float(os.getenv("SERPER_CACHE_TTL", "600"))
+SERPER_CACHE_TTLS = {
+    "search": float(os.getenv("SERPER_CACHE_TTL_SEARCH", SERPER_CACHE_TTL)),
+    "news": float(os.getenv("SERPER_CACHE_TTL_NEWS", "120")),
+    "images": float(os.getenv("SERPER_CACHE_TTL_IMAGES", "3600")),
+}
+SERPER_CACHE_STALE_TTL = float(os.getenv("SERPER_CACHE_STALE_TTL", "0"))
+SERPER_FETCH_MAX_NUM = env_flag("SERPER_FETCH_MAX_NUM")
+SERPER_NORMALIZE = env_flag("SERPER_NORMALIZE", True)
+SERPER_NORMALIZE_CASE = env_flag("SERPER_NORMALIZE_CASE", True)
+SERPER_BATCH_CONCURRENCY = int(os.getenv("SERPER_BATCH_CONCURRENCY", "10"))
+SERPER_RATE_LIMIT_QPS = float(os.getenv("SERPER_RATE_LIMIT_QPS", "0"))
+SERPER_RATE_LIMIT_BURST = float(os.getenv("SERPER_RATE_LIMIT_BURST", SERPER_RATE_LIMIT_QPS))
+SERPER_RATE_LIMIT_MAX_WAIT = float(os.getenv("SERPER_RATE_LIMIT_MAX_WAIT", "10"))
+SERPER_RETRY_ATTEMPTS = int(os.getenv("SERPER_RETRY_ATTEMPTS", "3"))
+SERPER_RETRY_BASE_DELAY = float(os.getenv("SERPER_RETRY_BASE_DELAY", "0.2"))
+SERPER_RETRY_MAX_DELAY = float(os.getenv("SERPER_RETRY_MAX_DELAY", "5"))
+SERPER_BREAKER_FAILURE_RATE = float(os.getenv("SERPER_BREAKER_FAILURE_RATE", "0.5"))
+SERPER_BREAKER_SLOW_SECONDS = float(os.getenv("SERPER_BREAKER_SLOW_SECONDS", "10"))
+SERPER_BREAKER_WINDOW = int(os.getenv("SERPER_BREAKER_WINDOW", "20"))
+SERPER_BREAKER_MIN_CALLS = int(os.getenv("SERPER_BREAKER_MIN_CALLS", "10"))
+SERPER_BREAKER_OPEN_SECONDS = float(os.getenv("SERPER_BREAKER_OPEN_SECONDS", "30"))
+SERPER_BREAKER_HALF_OPEN_CALLS = int(os.getenv("SERPER_BREAKER_HALF_OPEN_CALLS", "1"))
+SERPER_HEDGE_MAX_PER_SECOND = float(os.getenv("SERPER_HEDGE_MAX_PER_SECOND", "0"))
+SERPER_HEDGE_PERCENTILE = float(os.getenv("SERPER_HEDGE_PERCENTILE", "95"))
+SERPER_HEDGE_MIN_DELAY = float(os.getenv("SERPER_HEDGE_MIN_DELAY", "0.05"))
+SERPER_DEFAULT_PROJECTION = env_flag("SERPER_DEFAULT_PROJECTION", True)
+SERPER_PASSTHROUGH = env_flag("SERPER_PASSTHROUGH")
+SERPER_JSON_CODEC = os.getenv("SERPER_JSON_CODEC", "auto")
+# Passthrough results are text only, so they cannot carry structured content.
+SERPER_STRUCTURED_OUTPUT = env_flag("SERPER_STRUCTURED_OUTPUT") and not SERPER_PASSTHROUGH
+SERPER_TRACE_SAMPLE_RATE = float(os.getenv("SERPER_TRACE_SAMPLE_RATE", "0"))
+SERPER_TRACE_FILE = os.getenv("SERPER_TRACE_FILE", "")
+SERPER_TRACE_OTLP_ENDPOINT = os.getenv("SERPER_TRACE_OTLP_ENDPOINT", "")
+SERPER_BUDGET_WINDOW = float(os.getenv("SERPER_BUDGET_WINDOW", "86400"))
+SERPER_BUDGET_CLIENT_SOFT = float(os.getenv("SERPER_BUDGET_CLIENT_SOFT", "0"))
+SERPER_BUDGET_CLIENT_HARD = float(os.getenv("SERPER_BUDGET_CLIENT_HARD", "0"))
+SERPER_BUDGET_TOOL_SOFT = float(os.getenv("SERPER_BUDGET_TOOL_SOFT", "0"))
+SERPER_BUDGET_TOOL_HARD = float(os.getenv("SERPER_BUDGET_TOOL_HARD", "0"))
+SERPER_BUDGET_PATH = os.getenv("SERPER_BUDGET_PATH", "")
+SERPER_BUDGET_PERSIST_INTERVAL = float(os.getenv("SERPER_BUDGET_PERSIST_INTERVAL", "60"))
+SERPER_MAX_CONCURRENCY = int(os.getenv("SERPER_MAX_CONCURRENCY", SERPER_MAX_CONNECTIONS))
+SERPER_QUEUE_MAX = int(os.getenv("SERPER_QUEUE_MAX", "1000"))
+SERPER_BULK_TOOLS = frozenset(
+    t.strip() for t in os.getenv("SERPER_BULK_TOOLS", "batch_search").split(",") if t.strip()
+)
+SERPER_PRIORITY_WEIGHTS = {
+    "interactive": float(os.getenv("SERPER_PRIORITY_WEIGHT_INTERACTIVE", "8")),
+    "bulk": float(os.getenv("SERPER_PRIORITY_WEIGHT_BULK", "1")),
+}
+SERPER_DISK_CACHE_PATH = os.getenv("SERPER_DISK_CACHE_PATH", "")
+SERPER_DISK_CACHE_MAX_BYTES = int(
+    os.getenv("SERPER_DISK_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
 
 
 class QueryPayload(BaseModel):
@@ -12,35 +140,699 @@ class QueryPayload(BaseModel):
     num: int = Field(
         10,
         ge=1,
-        le=20,
+        le=MAX_NUM,
         description="Number of results to return from Serper.",
     )
+    sections: list[str] | None = Field(
+        None,
+        description=(
+            "Top-level response sections to keep, e.g. organic, knowledgeGraph, "
+            'peopleAlsoAsk. Defaults to a per-tool selection; ["*"] keeps all.'
+        ),
+    )
+    fields: list[str] | None = Field(
+        None,
+        description=(
+            "Keys to keep on each result item, e.g. title, link, snippet. "
+            'Defaults to a per-tool selection; ["*"] keeps all.'
+        ),
+    )
+    deadline: float | None = Field(
+        None,
+        gt=0,
+        le=120,
+        description=(
+            "Seconds to wait for an answer, including queueing and retries. "
+            "When it runs out a cached result or an error is returned."
+        ),
+    )
+
+    def upstream(self) -> dict:
+        """The part of the payload that is sent to Serper."""
+        return self.model_dump(exclude={"sections", "fields", "deadline"})
+
+
+Endpoint = Literal["search", "news", "images"]
+
+
+key_pool = KeyPool(
+    parse_keys(SERPER_API_KEYS or SERPER_API_KEY or ""),
+    strategy=SERPER_KEY_STRATEGY,
+    qps=SERPER_KEY_QPS,
+    burst=SERPER_KEY_BURST,
+    max_wait=SERPER_RATE_LIMIT_MAX_WAIT,
+    cooldown=SERPER_KEY_COOLDOWN,
+    path=SERPER_API_KEYS_FILE,
+)
+response_cache = ResponseCache(
+    SERPER_CACHE_MAX_BYTES, SERPER_CACHE_TTLS, SERPER_CACHE_TTL, SERPER_CACHE_STALE_TTL
+)
+disk_cache = (
+    DiskCache(SERPER_DISK_CACHE_PATH, SERPER_DISK_CACHE_MAX_BYTES, SERPER_CACHE_STALE_TTL)
+    if SERPER_DISK_CACHE_PATH
+    else None
+)
+inflight = SingleFlight()
+ledger = CreditLedger(
+    SERPER_BUDGET_WINDOW,
+    {
+        "client": (SERPER_BUDGET_CLIENT_SOFT, SERPER_BUDGET_CLIENT_HARD),
+        "tool": (SERPER_BUDGET_TOOL_SOFT, SERPER_BUDGET_TOOL_HARD),
+    },
+    SERPER_BUDGET_PATH,
+    SERPER_BUDGET_PERSIST_INTERVAL,
+)
+scheduler = Scheduler(SERPER_MAX_CONCURRENCY, SERPER_QUEUE_MAX, SERPER_PRIORITY_WEIGHTS)
+# (client, tool) of the MCP call being served, set by SerperMCP.call_tool.
+caller: ContextVar[tuple[str, str]] = ContextVar("serper_caller", default=("anonymous", "direct"))
+# Monotonic time by which the current call must be answered, set by run_query.
+call_deadline: ContextVar[float | None] = ContextVar("serper_deadline", default=None)
+normalizer = QueryNormalizer(SERPER_NORMALIZE, SERPER_NORMALIZE_CASE)
+json_codec = get_codec(SERPER_JSON_CODEC)
+rate_limits = {
+    endpoint: TokenBucket(
+        float(os.getenv(f"SERPER_RATE_LIMIT_QPS_{endpoint.upper()}", SERPER_RATE_LIMIT_QPS)),
+        float(os.getenv(f"SERPER_RATE_LIMIT_BURST_{endpoint.upper()}", SERPER_RATE_LIMIT_BURST)),
+        SERPER_RATE_LIMIT_MAX_WAIT,
+    )
+    for endpoint in ENDPOINTS
+}
+breakers = {
+    endpoint: CircuitBreaker(
+        endpoint,
+        SERPER_BREAKER_FAILURE_RATE,
+        SERPER_BREAKER_SLOW_SECONDS,
+        SERPER_BREAKER_WINDOW,
+        SERPER_BREAKER_MIN_CALLS,
+        SERPER_BREAKER_OPEN_SECONDS,
+        SERPER_BREAKER_HALF_OPEN_CALLS,
+    )
+    for endpoint in ENDPOINTS
+}
+retry_policy = RetryPolicy(SERPER_RETRY_ATTEMPTS, SERPER_RETRY_BASE_DELAY, SERPER_RETRY_MAX_DELAY)
+hedger = Hedger(SERPER_HEDGE_PERCENTILE, SERPER_HEDGE_MIN_DELAY, SERPER_HEDGE_MAX_PER_SECOND)
+_background: set[asyncio.Task] = set()
+_revalidating: set[str] = set()
+num_reuse = {"served": 0, "refetched": 0}
+
+if SERPER_TRACE_OTLP_ENDPOINT:
+    trace_exporter = OTLPHttpExporter(SERPER_TRACE_OTLP_ENDPOINT)
+elif SERPER_TRACE_FILE:
+    trace_exporter = FileExporter(SERPER_TRACE_FILE)
+else:
+    trace_exporter = None
+tracer = Tracer("serperdev-mcp", SERPER_TRACE_SAMPLE_RATE, trace_exporter)
+
+metrics_registry = Registry()
+TOOL_LATENCY = metrics_registry.histogram(
+    "serper_tool_duration_seconds", "MCP tool call latency.", ["tool"]
+)
+TOOL_RESULTS = metrics_registry.counter(
+    "serper_tool_results_total", "MCP tool calls by outcome.", ["tool", "outcome"]
+)
+UPSTREAM_LATENCY = metrics_registry.histogram(
+    "serper_upstream_duration_seconds", "Serper request latency.", ["endpoint"]
+)
+UPSTREAM_REQUESTS = metrics_registry.counter(
+    "serper_upstream_requests_total", "Serper requests by status class.", ["endpoint", "status"]
+)
+UPSTREAM_IN_FLIGHT = metrics_registry.gauge(
+    "serper_upstream_in_flight", "Serper requests currently in flight.", ["endpoint"]
+)
+QUEUE_WAIT = metrics_registry.histogram(
+    "serper_queue_wait_seconds", "Time spent queued for an upstream slot.", ["priority"]
+)
+UPSTREAM_BYTES = metrics_registry.histogram(
+    "serper_upstream_response_bytes", "Serper response body size.", ["endpoint"], BYTES_BUCKETS
+)
+upstream_latency = {e: UPSTREAM_LATENCY.labels(e) for e in ENDPOINTS}
+upstream_in_flight = {e: UPSTREAM_IN_FLIGHT.labels(e) for e in ENDPOINTS}
+upstream_bytes = {e: UPSTREAM_BYTES.labels(e) for e in ENDPOINTS}
+queue_wait = {p: QUEUE_WAIT.labels(p) for p in SERPER_PRIORITY_WEIGHTS}
+upstream_status = {
+    (e, status): UPSTREAM_REQUESTS.labels(e, status)
+    for e in ENDPOINTS
+    for status in ("2xx", "3xx", "4xx", "5xx", "error")
+}
+
+
+@metrics_registry.collector
+def component_metrics():
+    cache_events = Counter(
+        "serper_cache_events_total", "Response cache lookups and evictions.", ["cache", "event"]
+    )
+    cache_bytes = Gauge("serper_cache_bytes", "Bytes held by the response cache.", ["cache"])
+    for event in ("hits", "stale_hits", "misses", "evictions"):
+        cache_events.labels("memory", event).set(getattr(response_cache, event))
+    cache_bytes.labels("memory").set(response_cache.size)
+    if disk_cache is not None:
+        for event in ("hits", "misses", "compactions"):
+            cache_events.labels("disk", event).set(getattr(disk_cache, event))
+        cache_bytes.labels("disk").set(disk_cache.size)
+
+    breaker_state = Gauge(
+        "serper_breaker_state", "Circuit state (0 closed, 1 half-open, 2 open).", ["endpoint"]
+    )
+    breaker_rejected = Counter(
+        "serper_breaker_rejected_total", "Calls rejected by an open circuit.", ["endpoint"]
+    )
+    rate_limit_depth = Gauge(
+        "serper_rate_limit_queue_depth", "Calls waiting for a token.", ["endpoint"]
+    )
+    rate_limit_wait = Counter(
+        "serper_rate_limit_wait_seconds_total", "Time spent waiting for tokens.", ["endpoint"]
+    )
+    rate_limit_rejected = Counter(
+        "serper_rate_limit_rejected_total", "Calls whose token wait was too long.", ["endpoint"]
+    )
+    for endpoint in ENDPOINTS:
+        stats = breakers[endpoint].stats()
+        breaker_state.labels(endpoint).set(stats["state_code"])
+        breaker_rejected.labels(endpoint).set(stats["rejected"])
+        bucket = rate_limits[endpoint]
+        rate_limit_depth.labels(endpoint).set(bucket.waiting)
+        rate_limit_wait.labels(endpoint).set(bucket.wait_total)
+        rate_limit_rejected.labels(endpoint).set(bucket.rejected)
+
+    retries = Counter("serper_retries_total", "Upstream retry outcomes.", ["outcome"])
+    for outcome, value in retry_policy.stats().items():
+        retries.labels(outcome).set(value)
+    hedges = Counter("serper_hedges_total", "Hedged requests.", ["event"])
+    for event in ("sent", "wins", "skipped"):
+        hedges.labels(event).set(getattr(hedger, event))
+    reuse = Counter(
+        "serper_cache_num_reuse_total",
+        "Lookups served by trimming a larger cached result set, or refetched for more results.",
+        ["outcome"],
+    )
+    for outcome, value in num_reuse.items():
+        reuse.labels(outcome).set(value)
+    normalized = Counter(
+        "serper_normalized_queries_total", "Queries seen by the normalizer.", ["outcome"]
+    )
+    normalized.labels("rewritten").set(normalizer.rewritten)
+    normalized.labels("unchanged").set(normalizer.requests - normalizer.rewritten)
+    key_requests = Counter("serper_key_requests_total", "Upstream calls per API key.", ["key"])
+    key_errors = Counter("serper_key_errors_total", "Failed upstream calls per API key.", ["key"])
+    key_ejected = Gauge("serper_key_ejected", "Whether an API key is cooling down.", ["key"])
+    key_in_flight = Gauge("serper_key_in_flight", "In-flight calls per API key.", ["key"])
+    for stats in key_pool.stats():
+        key_requests.labels(stats["key"]).set(stats["requests"])
+        key_errors.labels(stats["key"]).set(stats["errors"])
+        key_ejected.labels(stats["key"]).set(int(stats["ejected"]))
+        key_in_flight.labels(stats["key"]).set(stats["in_flight"])
+    credits = Counter("serper_credits_total", "Serper credits spent per tool.", ["tool"])
+    free_hits = Counter(
+        "serper_credits_free_hits_total", "Cache hits that cost no credit.", ["tool"]
+    )
+    for tool, usage in ledger.totals().items():
+        credits.labels(tool).set(usage["credits"])
+        free_hits.labels(tool).set(usage["free_hits"])
+    budget_events = Counter(
+        "serper_budget_events_total", "Credit budget warnings and rejections.", ["event"]
+    )
+    budget_events.labels("warning").set(ledger.warnings)
+    budget_events.labels("rejection").set(ledger.rejections)
+    queue_depth_priority = Gauge(
+        "serper_queue_depth", "Calls queued for an upstream slot.", ["priority"]
+    )
+    for priority in SERPER_PRIORITY_WEIGHTS:
+        queue_depth_priority.labels(priority).set(scheduler.depth(priority))
+    slots = Gauge("serper_queue_active", "Upstream slots in use.")
+    slots.labels().set(scheduler.active)
+    shed = Counter("serper_queue_shed_total", "Calls shed by the scheduler.", ["reason"])
+    for reason, value in scheduler.shed.items():
+        shed.labels(reason).set(value)
+    revalidating = Gauge("serper_cache_revalidating", "Stale entries being refreshed.")
+    revalidating.labels().set(len(_revalidating))
+    coalesced = Counter("serper_coalesced_total", "Calls served by another in-flight request.")
+    coalesced.labels().set(inflight.shared)
+    abandoned = Counter(
+        "serper_upstream_abandoned_total", "Upstream requests cancelled after every caller left."
+    )
+    abandoned.labels().set(inflight.abandoned)
+    return (
+        cache_events, cache_bytes, breaker_state, breaker_rejected,
+        rate_limit_depth, rate_limit_wait, rate_limit_rejected, retries, hedges,
+        key_requests, key_errors, key_ejected, key_in_flight,
+        credits, free_hits, budget_events, queue_depth_priority, slots, shed,
+        reuse, normalized, revalidating, coalesced, abandoned,
+    )
+
+
+def current_deadline() -> float:
+    return call_deadline.get() or time.monotonic() + SERPER_DEADLINE
+
+
+def spawn(coro) -> asyncio.Task:
+    """Run a coroutine in the background, keeping a reference until it ends."""
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared, pooled Serper HTTP client (created on first use)."""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = SERPER_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                http2 = False
+        _client = httpx.AsyncClient(
+            base_url=SERPER_BASE_URL,
+            headers={"Content-Type": "application/json"},
+            timeout=SERPER_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=SERPER_MAX_CONNECTIONS,
+                max_keepalive_connections=SERPER_MAX_KEEPALIVE,
+            ),
+            http2=http2,
+        )
+    return _client
+
+
+def _elapsed(start: float | None) -> float:
+    return 0.0 if start is None else time.monotonic() - start
+
+
+async def send(endpoint: str, payload: dict, timeout: float, api_key: str) -> httpx.Response:
+    in_flight = upstream_in_flight[endpoint]
+    in_flight.inc()
+    start = time.perf_counter()
+    with tracer.span("http.request", SPAN_KIND_CLIENT, **{"serper.endpoint": endpoint}) as span:
+        extensions = {}
+        if span.recording:
+            requested = time.time_ns()
+            first_event = []
+
+            async def trace(event: str, info: dict) -> None:
+                if not first_event:
+                    first_event.append(event)
+                    tracer.record("pool.wait", requested, time.time_ns(), **{"pool.next": event})
+
+            extensions["trace"] = trace
+        try:
+            r = await get_client().post(
+                f"/{endpoint}",
+                headers={"X-API-KEY": api_key},
+                json=payload,
+                timeout=min(SERPER_TIMEOUT, timeout),
+                extensions=extensions,
+            )
+        except Exception:
+            upstream_status[endpoint, "error"].inc()
+            raise
+        finally:
+            in_flight.dec()
+            upstream_latency[endpoint].observe(time.perf_counter() - start)
+        upstream_status[endpoint, f"{min(r.status_code // 100, 5)}xx"].inc()
+        upstream_bytes[endpoint].observe(len(r.content))
+        if r.is_success:
+            ledger.charge(*caller.get(), 1 if payload.get("num", 10) <= 10 else 2)
+        span.set("http.status_code", r.status_code)
+        span.set("response.bytes", len(r.content))
+        r.raise_for_status()
+        return r
+
+
+async def keyed_send(endpoint: str, payload: dict, deadline: float) -> httpx.Response:
+    """Send with a key from the pool, moving on to another key if one is rejected."""
+    for _ in range(max(1, len(key_pool))):
+        api_key = key_pool.choose()
+        await api_key.bucket.acquire(deadline - time.monotonic())
+        api_key.in_flight += 1
+        timeout = deadline - time.monotonic()
+        try:
+            r = await hedger.run(
+                endpoint,
+                lambda: send(endpoint, payload, timeout, api_key.key),
+                lambda: try_acquire_all(rate_limits[endpoint], api_key.bucket),
+            )
+        except Exception as e:
+            key_pool.record(api_key, e)
+            if is_key_failure(e):
+                continue
+            raise
+        finally:
+            api_key.in_flight -= 1
+        key_pool.record(api_key, None)
+        return r
+    raise NoKeyAvailable("every Serper API key was rejected")
+
+
+async def attempt(endpoint: str, payload: dict, timeout: float) -> httpx.Response:
+    """Make a single upstream request within ``timeout`` seconds, raising on HTTP errors."""
+    breaker = breakers[endpoint]
+    ticket = breaker.allow()
+    start = None
+    deadline = time.monotonic() + timeout
+    try:
+        client, tool = caller.get()
+        priority = "bulk" if tool in SERPER_BULK_TOOLS else "interactive"
+        with tracer.span("queue.wait", **{"queue.priority": priority}):
+            waited = await scheduler.acquire(client, priority, deadline)
+        queue_wait[priority].observe(waited)
+        held = time.monotonic()
+        try:
+            with tracer.span("rate_limit.wait"):
+                await rate_limits[endpoint].acquire(deadline - time.monotonic())
+            start = time.monotonic()
+            r = await keyed_send(endpoint, payload, deadline)
+        finally:
+            scheduler.release(time.monotonic() - held)
+    except Exception as e:
+        breaker.record(
+            ticket, None if start is None else not is_upstream_fault(e), _elapsed(start)
+        )
+        raise
+    except BaseException:
+        breaker.record(ticket, None)
+        raise
+    breaker.record(ticket, True, _elapsed(start))
+    return r
+
+
+async def fetch(endpoint: str, payload: dict, key: str) -> bytes:
+    """Call Serper with retries and return the raw response body, caching successes.
+
+    A body that is not a JSON object, such as an error page from a proxy,
+    raises instead of being cached. A fresh cached entry that holds more
+    results, e.g. one fetched concurrently with a larger ``num``, is kept.
+    """
+    r = await retry_policy.run(
+        lambda remaining: attempt(endpoint, payload, remaining),
+        current_deadline(),
+    )
+    try:
+        data = decode(r.content)
+    except Exception as e:
+        raise ValueError(f"invalid JSON from Serper: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("invalid JSON from Serper: expected an object")
+    count = result_count(endpoint, data)
+
+    def replaces(cached: bytes) -> bool:
+        return body_count(endpoint, cached) <= count
+
+    ttl = response_cache.ttl_for(endpoint)
+    if response_cache.enabled:
+        response_cache.set(key, r.content, ttl, replaces)
+    if disk_cache is not None:
+        spawn(disk_cache.aset(key, r.content, ttl, replaces))
+    return r.content
+
+
+async def cached_body(key: str) -> tuple[bytes, float] | None:
+    """Look up a response in the memory cache, then on disk.
+
+    Returns ``(body, remaining_ttl)``; a non-positive TTL marks a stale
+    entry that should be revalidated.
+    """
+    if response_cache.enabled:
+        hit = response_cache.get(key)
+        if hit is not None:
+            return hit
+    if disk_cache is not None:
+        hit = await disk_cache.aget(key)
+        if hit is not None:
+            body, remaining = hit
+            if response_cache.enabled and remaining > 0:
+                response_cache.set(key, body, remaining)
+            return hit
+    return None
+
+
+def upstream(endpoint: str, payload: dict, key: str):
+    """Fetch via the coalescing layer, sharing requests with identical upstream payloads.
+
+    The shared fetch runs under the deadline of the caller that started it.
+    """
+    return inflight.do(cache_key(endpoint, payload), lambda: fetch(endpoint, payload, key))
+
+
+async def await_upstream(endpoint: str, payload: dict, key: str, deadline: float) -> bytes:
+    """Wait for the shared fetch of ``payload`` until ``deadline``.
+
+    A caller that joined a fetch started by someone else, and still has
+    time left when that fetch runs out of time, starts a fetch of its own.
+    """
+    joined = cache_key(endpoint, payload) in inflight
+    try:
+        async with asyncio.timeout_at(deadline):
+            return await upstream(endpoint, payload, key)
+    except (Shed, RateLimitExceeded, TimeoutError, httpx.TimeoutException):
+        if not joined or time.monotonic() >= deadline:
+            raise
+    async with asyncio.timeout_at(deadline):
+        return await upstream(endpoint, payload, key)
+
+
+def revalidate(endpoint: str, payload: dict, key: str) -> None:
+    """Refresh a stale entry in the background, at most once per key at a time.
 
+    The refresh is charged to the caller, so it is skipped once the
+    caller's credit budget is exhausted.
+    """
+    if key in _revalidating:
+        return
+    try:
+        ledger.check(*caller.get())
+    except BudgetExceeded:
+        return
+    _revalidating.add(key)
+
+    async def refresh():
+        call_deadline.set(None)
+        try:
+            await upstream(endpoint, payload, key)
+        except Exception:
+            pass
+        finally:
+            _revalidating.discard(key)
+
+    spawn(refresh())
+
+
+async def stale_body(key: str) -> bytes | None:
+    """Look up an expired-but-retained cache entry to serve as a fallback."""
+    body = response_cache.get_stale(key) if response_cache.enabled else None
+    if body is None and disk_cache is not None:
+        hit = await disk_cache.aget(key, stale=True)
+        if hit is not None:
+            body = hit[0]
+    return body
 
-def serper_post(endpoint: str, payload: dict):
-    """Helper to call Serper.dev API."""
-    if not SERPER_API_KEY:
+
+def decode(body: bytes):
+    with tracer.span("json.decode", **{"response.bytes": len(body)}):
+        return json_codec.loads(body)
+
+
+def body_count(endpoint: str, body: bytes) -> int:
+    """``result_count`` for a raw body, decoding it only if ``num`` is not echoed.
+
+    A body that does not decode counts as 0 results, so it is refetched.
+    """
+    num = echoed_num(body)
+    if num is not None:
+        return num
+    try:
+        return result_count(endpoint, decode(body))
+    except Exception:
+        return 0
+
+
+async def serper_body(endpoint: str, payload: dict) -> bytes | dict:
+    """Helper to call Serper.dev API, returning the raw response body.
+
+    Responses are cached without ``num``, so the body may hold more results
+    than requested and callers trim it. Errors are returned as an
+    ``{"error": ...}`` dict.
+    """
+    key_pool.maybe_reload()
+    if not key_pool:
         return {"error": "SERPER_API_KEY is not configured"}
 
+    payload = normalizer.canonical(payload)
+    num = payload.get("num", 10)
+    key = cache_key(endpoint, {k: v for k, v in payload.items() if k != "num"})
+    span = tracer.current()
+    span.set("serper.endpoint", endpoint)
+    with tracer.span("cache.lookup"):
+        hit = await cached_body(key)
+    if hit is not None:
+        body, remaining = hit
+        cached_num = body_count(endpoint, body)
+        if cached_num >= num:
+            span.set("cache.hit", True)
+            ledger.record_free(*caller.get())
+            if cached_num > num:
+                num_reuse["served"] += 1
+            if remaining <= 0:
+                span.set("cache.stale", True)
+                revalidate(endpoint, {**payload, "num": cached_num}, key)
+            return body
+        num_reuse["refetched"] += 1
+    span.set("cache.hit", False)
+
+    request = {**payload, "num": MAX_NUM} if SERPER_FETCH_MAX_NUM else payload
+    deadline = current_deadline()
+    try:
+        ledger.check(*caller.get())
+        with tracer.span("upstream", **{"serper.endpoint": endpoint}):
+            return await await_upstream(endpoint, request, key, deadline)
+    except (
+        CircuitOpen,
+        BudgetExceeded,
+        Shed,
+        RateLimitExceeded,
+        NoKeyAvailable,
+        TimeoutError,
+        httpx.TimeoutException,
+    ) as e:
+        body = await stale_body(key)
+        span.set("cache.stale", body is not None)
+        if body is not None:
+            return body
+        return {"error": str(e) or "deadline exceeded"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def passthrough(body: bytes) -> TextContent:
+    """Hand a response body to the MCP client as text without decoding it."""
+    with tracer.span("passthrough", **{"response.bytes": len(body)}):
+        return TextContent(type="text", text=body.decode())
+
+
+async def run_query(endpoint: str, payload: QueryPayload, raw: bool = False):
+    """Call Serper for a tool payload within its deadline and project the response.
+
+    With ``raw``, a response that needs neither projection nor trimming is
+    returned as the upstream bytes in a ``TextContent`` instead of a dict.
+    """
+    sections, fields = payload.sections, payload.fields
+    if SERPER_DEFAULT_PROJECTION:
+        if sections is None:
+            sections = DEFAULT_SECTIONS[endpoint]
+        if fields is None:
+            fields = DEFAULT_FIELDS[endpoint]
+    timeout = payload.deadline or SERPER_TOOL_DEADLINES.get(caller.get()[1], SERPER_DEADLINE)
+    deadline = time.monotonic() + timeout
+    outer = call_deadline.get()
+    token = call_deadline.set(min(deadline, outer) if outer else deadline)
     try:
-        r = requests.post(
-            f"https://google.serper.dev/{endpoint}",
-            headers={
-                "X-API-KEY": SERPER_API_KEY,
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=30,
+        body = await serper_body(endpoint, payload.upstream())
+    finally:
+        call_deadline.reset(token)
+    if isinstance(body, dict):
+        return body
+    if raw and keeps_all(sections, fields) and echoed_num(body) == payload.num:
+        return passthrough(body)
+    try:
+        return project(
+            endpoint, limit_results(endpoint, decode(body), payload.num), sections, fields
         )
-        r.raise_for_status()
-        return r.json()
     except Exception as e:
         return {"error": str(e)}
 
 
+def to_content(result, structured: bool = False):
+    """Encode a dict tool result as text content with the configured JSON codec.
+
+    With ``structured``, the dict is also returned as structured content,
+    which FastMCP validates against the tool's output schema.
+    """
+    if not isinstance(result, dict):
+        return result
+    text = TextContent(type="text", text=json_codec.dumps(result).decode())
+    if structured:
+        return CallToolResult(content=[text], structuredContent=result)
+    return text
+
+
+def timed_tool(output: type[BaseModel] | None = None):
+    """Record a tool's latency and outcome under its function name.
+
+    Dict results are encoded here rather than by FastMCP, inside the
+    traced ``serialize`` step. When ``SERPER_STRUCTURED_OUTPUT`` is on, a
+    tool given an ``output`` model also returns the dict as structured
+    content, and FastMCP publishes the model as its output schema.
+    """
+    structured = SERPER_STRUCTURED_OUTPUT and output is not None
+
+    def decorate(fn):
+        latency = TOOL_LATENCY.labels(fn.__name__)
+        ok = TOOL_RESULTS.labels(fn.__name__, "ok")
+        error = TOOL_RESULTS.labels(fn.__name__, "error")
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            call = tracer.current()
+            if call.recording:
+                tracer.record("validate", call.start, time.time_ns())
+            start = time.perf_counter()
+            try:
+                with tracer.span(f"tool {fn.__name__}"):
+                    result = await fn(*args, **kwargs)
+            except Exception:
+                error.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+                if call.recording:
+                    call.mark = time.time_ns()
+            (error if isinstance(result, dict) and "error" in result else ok).inc()
+            return to_content(result, structured)
+
+        if structured:
+            wrapper.__signature__ = inspect.signature(fn).replace(
+                return_annotation=Annotated[CallToolResult, output]
+            )
+        return wrapper
+
+    return decorate
+
+
+class SerperMCP(FastMCP):
+    def client_id(self) -> str:
+        """Identify the caller by the server-assigned HTTP session ID.
+
+        The client-supplied ``client_id`` is not used, since a client could
+        change it to escape its credit budget.
+        """
+        try:
+            request = self.get_context().request_context.request
+        except ValueError:
+            return "anonymous"
+        headers = getattr(request, "headers", None)
+        return (headers.get("mcp-session-id") if headers else None) or "anonymous"
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Trace a whole tool call, including argument validation and result conversion."""
+        token = caller.set((self.client_id(), name))
+        try:
+            with tracer.span(
+                f"tools/call {name}", SPAN_KIND_SERVER, root=True, **{"mcp.tool": name}
+            ) as span:
+                result = await super().call_tool(name, arguments)
+                if span.recording and span.mark:
+                    tracer.record("serialize", span.mark, time.time_ns())
+                return result
+        finally:
+            caller.reset(token)
+
+
 port = int(os.getenv("PORT", "8080"))
 
-app = FastMCP(
+app = SerperMCP(
     "Serperdev MCP",
     instructions="Google SERP, news, and image results via Serper.dev",
     host="0.0.0.0",
@@ -49,21 +841,97 @@ app = FastMCP(
 
 
 @app.tool()
-def search(payload: QueryPayload):
+@timed_tool(SearchResponse)
+async def search(payload: QueryPayload):
     """Run a Google search via Serper.dev."""
-    return serper_post("search", payload.model_dump())
+    return await run_query("search", payload, raw=SERPER_PASSTHROUGH)
 
 
 @app.tool()
-def news(payload: QueryPayload):
+@timed_tool(NewsResponse)
+async def news(payload: QueryPayload):
     """Search news articles via Serper.dev."""
-    return serper_post("news", payload.model_dump())
+    return await run_query("news", payload, raw=SERPER_PASSTHROUGH)
 
 
 @app.tool()
-def images(payload: QueryPayload):
+@timed_tool(ImagesResponse)
+async def images(payload: QueryPayload):
     """Search for images via Serper.dev."""
-    return serper_post("images", payload.model_dump())
+    return await run_query("images", payload, raw=SERPER_PASSTHROUGH)
+
+
+@app.tool()
+@timed_tool()
+async def batch_search(
+    queries: list[QueryPayload] = Field(..., min_length=1, max_length=50),
+    endpoint: Endpoint = "search",
+):
+    """Run several queries concurrently via Serper.dev.
+
+    Results are returned in input order; a failed or timed-out query yields
+    an ``{"error": ...}`` entry instead of failing the whole batch. Each
+    query gets its own ``deadline``, or ``SERPER_DEADLINE_BATCH_SEARCH``,
+    counted from when it leaves the batch's concurrency limit.
+    """
+    semaphore = asyncio.Semaphore(SERPER_BATCH_CONCURRENCY)
+
+    async def run(payload: QueryPayload):
+        async with semaphore:
+            try:
+                return await run_query(endpoint, payload)
+            except Exception as e:
+                return {"error": str(e)}
+
+    results = await asyncio.gather(*(run(payload) for payload in queries))
+    return {"endpoint": endpoint, "results": results}
+
+
+@app.tool()
+@timed_tool(SearchAllResponse)
+async def search_all(
+    payload: QueryPayload,
+    verticals: list[Endpoint] = Field(
+        list(ENDPOINTS), min_length=1, description="Verticals to query concurrently."
+    ),
+):
+    """Run one query against web, news and image search at once via Serper.dev.
+
+    The verticals run concurrently under one shared deadline, so the call
+    takes as long as the slowest of them. A vertical that fails or times
+    out yields an ``{"error": ...}`` entry while the others are still
+    returned.
+    """
+    verticals = list(dict.fromkeys(verticals))
+    timeout = payload.deadline or SERPER_TOOL_DEADLINES["search_all"]
+    token = call_deadline.set(time.monotonic() + timeout)
+    try:
+        results = await asyncio.gather(
+            *(run_query(vertical, payload) for vertical in verticals), return_exceptions=True
+        )
+    finally:
+        call_deadline.reset(token)
+    return {
+        vertical: {"error": str(result)} if isinstance(result, Exception) else result
+        for vertical, result in zip(verticals, results)
+    }
+
+
+@app.custom_route("/metrics", methods=["GET"])
+async def metrics_route(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.custom_route("/normalization", methods=["GET"])
+async def normalization_route(request: Request) -> JSONResponse:
+    return JSONResponse(normalizer.report(int(request.query_params.get("top", "50"))))
+
+
+@app.custom_route("/budget", methods=["GET"])
+async def budget_route(request: Request) -> JSONResponse:
+    return JSONResponse(ledger.snapshot())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is still running await the same task. Results and exceptions
+    are delivered to every waiter, and nothing is kept once the task ends.
+    A waiter that is cancelled stops waiting without disturbing the others;
+    the shared task itself is cancelled only when its last waiter is gone.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self.abandoned = 0
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._tasks.get(key) is task and not task.done():
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0:
+                    self.abandoned += 1
+                    task.cancel()
+            raise
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tasks
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "abandoned": self.abandoned,
+        }
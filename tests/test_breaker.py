@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def make_breaker(half_open_calls: int = 1) -> CircuitBreaker:
+    return CircuitBreaker(
+        "search",
+        failure_rate=0.5,
+        slow_seconds=1.0,
+        window=4,
+        min_calls=2,
+        open_seconds=0.02,
+        half_open_calls=half_open_calls,
+    )
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record(breaker.allow(), False)
+    assert breaker.state == OPEN
+
+
+def test_opens_at_failure_rate_and_rejects():
+    breaker = make_breaker()
+    breaker.record(breaker.allow(), True)
+    breaker.record(breaker.allow(), False)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = make_breaker()
+    for _ in range(2):
+        breaker.record(breaker.allow(), True, latency=2.0)
+    assert breaker.state == OPEN
+
+
+def test_good_trial_closes_and_bad_trial_reopens():
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.03)
+    breaker.record(breaker.allow(), False)
+    assert breaker.state == OPEN
+    time.sleep(0.03)
+    breaker.record(breaker.allow(), True)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_admits_only_trial_calls():
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.03)
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+
+def test_call_admitted_before_opening_cannot_close_half_open():
+    breaker = make_breaker()
+    old = breaker.allow()
+    trip(breaker)
+    time.sleep(0.03)
+    trial = breaker.allow()
+    breaker.record(old, True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.trials == 1
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    breaker.record(trial, True)
+    assert breaker.state == CLOSED
+
+
+def test_released_trial_frees_its_slot():
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.03)
+    breaker.record(breaker.allow(), None)
+    assert breaker.state == HALF_OPEN
+    breaker.record(breaker.allow(), True)
+    assert breaker.state == CLOSED
@@ -0,0 +1,55 @@
+import json
+import logging
+
+import pytest
+
+from budget import BudgetExceeded, CreditLedger
+
+
+def test_hard_limit_rejects_until_the_window_rolls_over(monkeypatch):
+    ledger = CreditLedger(3600, {"client": (0, 2)})
+    ledger.charge("alice", "search", 2)
+    with pytest.raises(BudgetExceeded, match="client:alice"):
+        ledger.check("alice", "search")
+    ledger.check("bob", "search")
+    assert ledger.rejections == 1
+
+    monkeypatch.setattr(ledger, "_current_window", lambda: ledger._window_id + 1)
+    ledger.check("alice", "search")
+
+
+def test_tool_limit_applies_across_clients():
+    ledger = CreditLedger(3600, {"tool": (0, 2)})
+    ledger.charge("alice", "search", 1)
+    ledger.charge("bob", "search", 1)
+    with pytest.raises(BudgetExceeded, match="tool:search"):
+        ledger.check("carol", "search")
+    ledger.check("carol", "news")
+
+
+def test_soft_limit_warns_once_per_window(caplog):
+    ledger = CreditLedger(3600, {"client": (2, 0)})
+    with caplog.at_level(logging.WARNING, logger="budget"):
+        for _ in range(4):
+            ledger.charge("alice", "search", 1)
+    assert ledger.warnings == 1
+    assert len(caplog.records) == 1
+
+
+def test_free_hits_are_counted_without_credits():
+    ledger = CreditLedger(3600, {})
+    ledger.charge("alice", "search", 2)
+    ledger.record_free("alice", "search")
+    assert ledger.totals() == {"search": {"credits": 2, "calls": 1, "free_hits": 1}}
+
+
+def test_usage_survives_a_restart_within_the_window(tmp_path):
+    path = str(tmp_path / "ledger.json")
+    ledger = CreditLedger(3600, {"client": (0, 3)}, path)
+    ledger.charge("alice", "search", 3)
+    ledger.save()
+    assert json.loads(open(path).read())["usage"]["client:alice"]["credits"] == 3
+
+    restarted = CreditLedger(3600, {"client": (0, 3)}, path)
+    with pytest.raises(BudgetExceeded):
+        restarted.check("alice", "search")
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from cache import DiskCache, ResponseCache
+
+
+def make_cache(max_bytes: int = 1000, stale_ttl: float = 0.0) -> ResponseCache:
+    return ResponseCache(max_bytes, {"news": 5}, 60, stale_ttl)
+
+
+def test_get_returns_the_body_and_remaining_ttl():
+    cache = make_cache()
+    cache.set("k", b"body", 60)
+    body, remaining = cache.get("k")
+    assert body == b"body"
+    assert 59 < remaining <= 60
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entry_is_a_miss_but_kept_for_fallback():
+    cache = make_cache()
+    cache.set("k", b"body", 60)
+    cache._entries["k"] = (0.0, b"body")
+    assert cache.get("k") is None
+    assert cache.get_stale("k") == b"body"
+
+
+def test_evicts_least_recently_used_entries_past_the_byte_budget():
+    cache = make_cache(max_bytes=10)
+    cache.set("a", b"aaaa", 60)
+    cache.set("b", b"bbbb", 60)
+    cache.get("a")
+    cache.set("c", b"cccc", 60)
+    assert cache.get_stale("b") is None
+    assert cache.get_stale("a") == b"aaaa"
+    assert cache.size == 8
+    assert cache.evictions == 1
+
+
+def test_oversized_bodies_and_zero_ttls_are_not_stored():
+    cache = make_cache(max_bytes=4)
+    cache.set("big", b"too large", 60)
+    cache.set("zero", b"ok", 0)
+    assert cache.stats()["entries"] == 0
+
+
+def test_ttl_per_endpoint():
+    cache = make_cache()
+    assert cache.ttl_for("news") == 5
+    assert cache.ttl_for("search") == 60
+
+
+def test_replace_can_keep_a_fresh_entry():
+    cache = make_cache()
+    cache.set("k", b"large", 60)
+    cache.set("k", b"small", 60, lambda cached: cached != b"large")
+    assert cache.get("k")[0] == b"large"
+    cache.set("k", b"other", 60)
+    assert cache.get("k")[0] == b"other"
+
+
+def test_replace_is_ignored_for_an_expired_entry():
+    cache = make_cache()
+    cache.set("k", b"large", 60)
+    cache._entries["k"] = (0.0, b"large")
+    cache.set("k", b"small", 60, lambda cached: False)
+    assert cache.get("k")[0] == b"small"
+
+
+def test_disk_replace_can_keep_a_fresh_entry(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), 1 << 20)
+    cache.set("k", b"large", 60)
+    cache.set("k", b"small", 60, lambda cached: cached != b"large")
+    assert cache.get("k")[0] == b"large"
+
+
+def test_disk_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = DiskCache(path, 1 << 20)
+    cache.set("k", b'{"organic": []}' * 10, 60)
+    cache.close()
+
+    reopened = DiskCache(path, 1 << 20)
+    body, remaining = reopened.get("k")
+    assert body == b'{"organic": []}' * 10
+    assert remaining > 59
+    assert reopened.size > 0
+
+
+def test_disk_cache_serves_expired_rows_only_as_stale(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), 1 << 20)
+    cache.set("k", b"body", 60)
+    cache._db.execute("UPDATE responses SET expires = 0")
+    assert cache.get("k") is None
+    assert cache.get("k", stale=True)[0] == b"body"
+
+
+def test_disk_cache_compacts_rows_closest_to_expiry_first(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), 1000)
+    for i in range(10):
+        cache.set(f"k{i}", bytes(range(256)), 60 + i)
+    assert cache.compactions > 0
+    assert cache.size <= 1000
+    assert cache.get("k0") is None
+    assert cache.get("k9") is not None
+
+
+def test_disk_cache_async_helpers(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), 1 << 20)
+
+    async def main():
+        await cache.aset("k", b"body", 60)
+        return await cache.aget("k")
+
+    assert asyncio.run(main())[0] == b"body"
+
+
+def test_entry_is_served_stale_within_the_stale_window():
+    cache = make_cache(stale_ttl=30)
+    cache.set("k", b"body", 60)
+    cache._entries["k"] = (time.monotonic() - 10, b"body")
+    body, remaining = cache.get("k")
+    assert body == b"body"
+    assert remaining <= 0
+    assert cache.stale_hits == 1
+    cache._entries["k"] = (time.monotonic() - 31, b"body")
+    assert cache.get("k") is None
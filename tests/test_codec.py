@@ -0,0 +1,37 @@
+import datetime
+import json
+
+import pytest
+
+from codec import JsonCodec, available, get_codec
+
+DATA = {"q": "café", "num": 10, "organic": [{"title": "t", "position": 1}], "b": None}
+
+
+@pytest.mark.parametrize("name", available())
+def test_codecs_round_trip_and_agree_on_sorted_output(name):
+    codec = JsonCodec(name)
+    encoded = codec.dumps(DATA)
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == DATA
+    assert codec.loads(encoded.decode()) == DATA
+    assert codec.dumps_sorted(DATA) == JsonCodec("json").dumps_sorted(DATA)
+
+
+@pytest.mark.parametrize("name", available())
+def test_unsupported_values_fall_back_to_str(name):
+    when = datetime.date(2024, 1, 2)
+    assert json.loads(JsonCodec(name).dumps({"when": when, "id": object})) == {
+        "when": str(when),
+        "id": str(object),
+    }
+
+
+def test_auto_picks_the_fastest_installed_codec():
+    assert get_codec().name == available()[0]
+    assert available()[-1] == "json"
+
+
+def test_unknown_or_missing_codec_is_rejected():
+    with pytest.raises(ValueError, match="not available"):
+        get_codec("simdjson")
@@ -0,0 +1,90 @@
+import asyncio
+
+from hedge import Hedger
+from ratelimit import TokenBucket, try_acquire_all
+
+
+def warmed_hedger(max_per_second: float = 100) -> Hedger:
+    hedger = Hedger(percentile=50, min_delay=0.01, max_per_second=max_per_second, min_samples=1)
+    hedger.observe("search", 0.01)
+    return hedger
+
+
+def slow_then_fast(calls: list):
+    async def send():
+        calls.append(1)
+        await asyncio.sleep(0.2 if len(calls) == 1 else 0.001)
+        return len(calls)
+
+    return send
+
+
+def test_no_hedge_until_latencies_are_known():
+    hedger = Hedger(percentile=50, min_delay=0.01, max_per_second=100)
+    calls = []
+    assert asyncio.run(hedger.run("search", slow_then_fast(calls))) == 1
+    assert len(calls) == 1
+    assert hedger.sent == 0
+
+
+def test_hedge_wins_over_a_slow_primary():
+    hedger = warmed_hedger()
+    calls = []
+    assert asyncio.run(hedger.run("search", slow_then_fast(calls))) == 2
+    assert hedger.sent == 1
+    assert hedger.wins == 1
+
+
+def test_hedge_skipped_when_rate_limit_refuses():
+    hedger = warmed_hedger()
+    calls = []
+    result = asyncio.run(hedger.run("search", slow_then_fast(calls), lambda: False))
+    assert result == 1
+    assert len(calls) == 1
+    assert hedger.sent == 0
+    assert hedger.skipped == 1
+    assert hedger.budget.tokens >= 1
+
+
+def test_refused_hedge_spends_no_rate_limit_tokens():
+    hedger = warmed_hedger()
+    endpoint, key = TokenBucket(10, 1, 1), TokenBucket(10, 1, 1)
+    key.try_acquire()
+    calls = []
+    result = asyncio.run(
+        hedger.run("search", slow_then_fast(calls), lambda: try_acquire_all(endpoint, key))
+    )
+    assert result == 1
+    assert endpoint.tokens >= 1
+    assert (endpoint.rejected, key.rejected) == (0, 0)
+    assert hedger.skipped == 1
+
+
+def test_hedge_skipped_when_budget_is_spent():
+    hedger = warmed_hedger(max_per_second=1)
+    hedger.budget.try_acquire()
+    calls = []
+    admitted = []
+
+    def admit():
+        admitted.append(1)
+        return True
+
+    assert asyncio.run(hedger.run("search", slow_then_fast(calls), admit)) == 1
+    assert hedger.skipped == 1
+    assert admitted == []
+
+
+def test_failed_primary_falls_back_to_hedge():
+    hedger = warmed_hedger()
+    calls = []
+
+    async def send():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise ConnectionError("reset")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert asyncio.run(hedger.run("search", send)) == "hedge"
@@ -0,0 +1,67 @@
+import collections
+
+import httpx
+import pytest
+
+from keys import KeyPool, NoKeyAvailable, is_key_failure, parse_keys
+
+
+def status_error(status: int, text: str = "") -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://google.serper.dev/search")
+    response = httpx.Response(status, text=text, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+def test_parse_keys_with_weights_and_comments():
+    text = "alpha:3, beta\n# retired\ngamma:0.5  # backup\n"
+    assert parse_keys(text) == [("alpha", 3.0), ("beta", 1.0), ("gamma", 0.5)]
+
+
+def test_weighted_round_robin_follows_the_weights():
+    pool = KeyPool([("alpha", 3), ("beta", 1)])
+    picks = collections.Counter(pool.choose().key for _ in range(8))
+    assert picks == {"alpha": 6, "beta": 2}
+
+
+def test_least_loaded_prefers_the_idlest_key_per_weight():
+    pool = KeyPool([("alpha", 2), ("beta", 1)], strategy="least_loaded")
+    alpha, beta = pool.keys
+    alpha.in_flight, beta.in_flight = 2, 0
+    assert pool.choose() is beta
+    beta.in_flight = 2
+    assert pool.choose() is alpha
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match="unknown key strategy"):
+        KeyPool([("alpha", 1)], strategy="random")
+
+
+def test_auth_and_credit_errors_eject_the_key():
+    assert is_key_failure(status_error(401))
+    assert is_key_failure(status_error(400, "Not enough credits"))
+    assert not is_key_failure(status_error(400, "bad query"))
+    assert not is_key_failure(status_error(500))
+
+    pool = KeyPool([("alpha", 1), ("beta", 1)], cooldown=60)
+    alpha = pool.keys[0]
+    pool.record(alpha, status_error(403))
+    assert all(pool.choose().key == "beta" for _ in range(3))
+    pool.record(pool.keys[1], status_error(401))
+    with pytest.raises(NoKeyAvailable):
+        pool.choose()
+    assert [s["ejected"] for s in pool.stats()] == [True, True]
+
+
+def test_reload_keeps_counters_of_keys_still_listed(tmp_path):
+    path = tmp_path / "keys.txt"
+    path.write_text("alpha\nbeta\n")
+    pool = KeyPool([], path=str(path), reload_interval=0)
+    pool.record(pool.keys[0], None)
+    path.write_text("alpha:2\ngamma\n")
+    pool.maybe_reload(force=True)
+    assert [(k.key, k.weight, k.requests) for k in pool.keys] == [
+        ("alpha", 2.0, 1),
+        ("gamma", 1.0, 0),
+    ]
+    assert pool.reloads == 2
@@ -0,0 +1,21 @@
+from metrics import Counter, Registry
+
+
+def test_render_in_prometheus_text_format():
+    registry = Registry()
+    calls = registry.counter("calls_total", "Calls.", ["tool"])
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    calls.labels("search").inc(2)
+    latency.labels().observe(0.5)
+    text = registry.render()
+    assert 'calls_total{tool="search"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
+
+
+def test_children_are_bound_once_per_label_set():
+    counter = Counter("events_total", "Events.", ["event"])
+    assert counter.labels("hit") is counter.labels("hit")
+    assert counter.labels("hit") is not counter.labels("miss")
@@ -0,0 +1,52 @@
+from normalize import QueryNormalizer
+
+
+def test_whitespace_unicode_and_case_are_canonicalized():
+    normalizer = QueryNormalizer()
+    assert normalizer.normalize_query("  Café   Paris\t") == "café paris"
+
+
+def test_boolean_operators_keep_their_case():
+    normalizer = QueryNormalizer()
+    query = normalizer.normalize_query("Python OR Rust AROUND(3) Go")
+    assert query == "python OR rust AROUND(3) go"
+
+
+def test_case_folding_can_be_disabled():
+    assert QueryNormalizer(fold_case=False).normalize_query(" Python  Docs ") == "Python Docs"
+
+
+def test_canonical_payloads_share_key_order_and_query():
+    normalizer = QueryNormalizer()
+    a = normalizer.canonical({"q": "Python  Docs", "num": 10, "gl": "us"})
+    b = normalizer.canonical({"gl": "us", "num": 10, "q": "python docs"})
+    assert a == b
+    assert list(a) == list(b) == ["gl", "num", "q"]
+
+
+def test_disabled_normalizer_returns_the_payload_unchanged():
+    payload = {"q": "Python  Docs"}
+    assert QueryNormalizer(enabled=False).canonical(payload) is payload
+
+
+def test_report_counts_collapsed_variants():
+    normalizer = QueryNormalizer()
+    for q in ("Python", "python", " PYTHON ", "rust"):
+        normalizer.canonical({"q": q})
+    report = normalizer.report()
+    assert report["requests"] == 4
+    assert report["rewritten"] == 2
+    assert report["canonical_queries"] == 2
+    assert report["collapsed"] == 2
+    assert report["top"][0]["canonical"] == "python"
+    assert report["top"][0]["variants"] == 3
+
+
+def test_variant_tracking_is_bounded():
+    normalizer = QueryNormalizer(max_keys=2, max_variants=2)
+    for q in ("a", "A", " a ", "b", "c"):
+        normalizer.canonical({"q": q})
+    assert list(normalizer._variants) == ["b", "c"]
+    normalizer.canonical({"q": "B"})
+    normalizer.canonical({"q": " b"})
+    assert len(normalizer._variants["b"]) == 2
@@ -0,0 +1,61 @@
+from projection import echoed_num, keeps_all, limit_results, project, result_count
+
+RESPONSE = {
+    "searchParameters": {"q": "python", "num": 10},
+    "organic": [{"title": "t", "link": "l", "snippet": "s", "position": 1}],
+    "peopleAlsoAsk": [{"question": "q?", "snippet": "s", "link": "l"}],
+    "relatedSearches": [{"query": "python asyncio"}],
+}
+
+
+def test_keeps_everything_by_default():
+    assert project("search", RESPONSE) is RESPONSE
+    assert project("search", RESPONSE, ["*"], ["*"]) is RESPONSE
+    assert keeps_all()
+    assert not keeps_all(fields=["title"])
+
+
+def test_fields_apply_only_to_the_result_list():
+    out = project("search", RESPONSE, fields=["title", "link"])
+    assert out["organic"] == [{"title": "t", "link": "l"}]
+    assert out["peopleAlsoAsk"] == RESPONSE["peopleAlsoAsk"]
+    assert out["relatedSearches"] == RESPONSE["relatedSearches"]
+
+
+def test_secondary_sections_survive_a_field_selection():
+    out = project("search", RESPONSE, ["peopleAlsoAsk", "relatedSearches"], ["title"])
+    assert out == {
+        "peopleAlsoAsk": [{"question": "q?", "snippet": "s", "link": "l"}],
+        "relatedSearches": [{"query": "python asyncio"}],
+    }
+
+
+def test_input_is_not_modified():
+    project("search", RESPONSE, ["organic"], ["title"])
+    assert RESPONSE["organic"][0]["snippet"] == "s"
+
+
+def test_echoed_num_is_read_from_the_raw_body():
+    assert echoed_num(b'{"searchParameters": {"q": "x", "num": 20}, "organic": []}') == 20
+    assert echoed_num(b'{"organic": []}') is None
+
+
+def test_result_count_prefers_the_echoed_num():
+    assert result_count("search", RESPONSE) == 10
+    assert result_count("news", {"news": [{}, {}]}) == 2
+    assert result_count("images", {"images": []}) == 20
+
+
+def test_limit_results_trims_the_result_list():
+    data = {"organic": [{"position": i} for i in range(5)]}
+    assert limit_results("search", data, 2) == {"organic": [{"position": 0}, {"position": 1}]}
+    assert len(data["organic"]) == 5
+    assert limit_results("search", data, 10) is data
+
+
+def test_limit_results_lowers_the_echoed_num():
+    data = {"searchParameters": {"q": "x", "num": 20}, "organic": [{}] * 20}
+    out = limit_results("search", data, 10)
+    assert out["searchParameters"] == {"q": "x", "num": 10}
+    assert len(out["organic"]) == 10
+    assert data["searchParameters"]["num"] == 20
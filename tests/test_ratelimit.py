@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from ratelimit import RateLimitExceeded, TokenBucket, try_acquire_all
+
+
+def test_disabled_bucket_never_limits():
+    bucket = TokenBucket(0, 0, 0)
+    assert all(bucket.try_acquire() for _ in range(100))
+    assert asyncio.run(bucket.acquire()) == 0.0
+
+
+def test_try_acquire_spends_the_burst_then_refuses():
+    bucket = TokenBucket(1, 2, 10)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.rejected == 1
+
+
+def test_acquire_queues_for_the_next_token():
+    async def main():
+        bucket = TokenBucket(50, 1, 1)
+        start = time.monotonic()
+        waits = [await bucket.acquire() for _ in range(3)]
+        return waits, time.monotonic() - start
+
+    waits, elapsed = asyncio.run(main())
+    assert waits[0] == 0.0
+    assert waits[1] == pytest.approx(0.02, abs=0.01)
+    assert elapsed >= 0.035
+
+
+def test_wait_beyond_max_wait_is_rejected():
+    async def main():
+        bucket = TokenBucket(1, 1, 0.5)
+        await bucket.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire()
+        return bucket
+
+    assert asyncio.run(main()).rejected == 1
+
+
+def test_max_wait_argument_only_tightens():
+    async def main():
+        bucket = TokenBucket(10, 1, 1)
+        await bucket.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire(max_wait=0.01)
+        return await bucket.acquire(max_wait=5)
+
+    assert asyncio.run(main()) <= 1
+
+
+def test_cancelled_waiter_returns_its_token():
+    async def main():
+        bucket = TokenBucket(10, 1, 1)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return bucket
+
+    bucket = asyncio.run(main())
+    assert bucket.waiting == 0
+    assert bucket.tokens > -1
+
+
+def test_try_acquire_all_takes_from_every_bucket_or_none():
+    first, second = TokenBucket(1, 1, 1), TokenBucket(1, 1, 1)
+    assert try_acquire_all(first, second)
+    first.tokens = 1
+    assert not try_acquire_all(first, second)
+    assert first.tokens == pytest.approx(1, abs=0.01)
+    assert (first.rejected, second.rejected) == (0, 0)
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from retry import RetryPolicy, is_retryable, retry_after
+
+
+def status_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://google.serper.dev/search")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+def failing(errors: list, result="ok"):
+    """Raise each of ``errors`` in turn, then return ``result``."""
+    calls = []
+
+    async def fn(remaining):
+        calls.append(remaining)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def test_retry_after_in_seconds_and_as_a_date():
+    assert retry_after(status_error(429, {"Retry-After": "2"})) == 2.0
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = retry_after(status_error(503, {"Retry-After": format_datetime(later, usegmt=True)}))
+    assert 25 < delay <= 30
+    assert retry_after(status_error(429, {"Retry-After": "soon"})) is None
+    assert retry_after(status_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_only_transport_errors_and_retryable_statuses_are_retried():
+    assert is_retryable(status_error(429))
+    assert is_retryable(status_error(503))
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert not is_retryable(status_error(400))
+    assert not is_retryable(ValueError())
+
+
+def test_recovers_after_transient_failures():
+    policy = RetryPolicy(3, 0.001, 0.01)
+    fn, calls = failing([httpx.ConnectError("refused"), status_error(502)])
+    assert asyncio.run(policy.run(fn, time.monotonic() + 5)) == "ok"
+    assert len(calls) == 3
+    assert policy.stats() == {"retries": 2, "recovered": 1, "exhausted": 0}
+
+
+def test_non_retryable_errors_raise_at_once():
+    policy = RetryPolicy(3, 0.001, 0.01)
+    fn, calls = failing([status_error(401)])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.run(fn, time.monotonic() + 5))
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_attempts():
+    policy = RetryPolicy(2, 0.001, 0.01)
+    fn, calls = failing([status_error(500)] * 3)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.run(fn, time.monotonic() + 5))
+    assert len(calls) == 2
+    assert policy.exhausted == 1
+
+
+def test_retry_after_past_the_deadline_is_not_waited_for():
+    policy = RetryPolicy(3, 0.001, 0.01)
+    fn, calls = failing([status_error(429, {"Retry-After": "10"})])
+    start = time.monotonic()
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.run(fn, start + 1))
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 1
+    assert policy.exhausted == 1
+
+
+def test_expired_deadline_raises_a_timeout():
+    policy = RetryPolicy(3, 0.001, 0.01)
+    fn, calls = failing([])
+    with pytest.raises(httpx.TimeoutException):
+        asyncio.run(policy.run(fn, time.monotonic() - 1))
+    assert calls == []
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from scheduler import Scheduler, Shed
+
+WEIGHTS = {"interactive": 8, "bulk": 1}
+
+
+def far() -> float:
+    return time.monotonic() + 10
+
+
+def test_admits_up_to_concurrency_without_queueing():
+    async def main():
+        scheduler = Scheduler(2, 10, WEIGHTS)
+        waits = [await scheduler.acquire("a", "interactive", far()) for _ in range(2)]
+        return scheduler, waits
+
+    scheduler, waits = asyncio.run(main())
+    assert waits == [0.0, 0.0]
+    assert scheduler.active == 2
+
+
+def test_interactive_work_overtakes_queued_bulk_work():
+    async def main():
+        scheduler = Scheduler(1, 10, WEIGHTS)
+        await scheduler.acquire("holder", "interactive", far())
+        order = []
+
+        async def call(session, priority, name):
+            await scheduler.acquire(session, priority, far())
+            order.append(name)
+            scheduler.release(0.001)
+
+        tasks = [asyncio.ensure_future(call("batch", "bulk", f"bulk{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(call("user", "interactive", "int0")))
+        await asyncio.sleep(0)
+        scheduler.release(0.001)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(main()).index("int0") < 2
+
+
+def test_full_queue_displaces_bulk_for_interactive():
+    async def main():
+        scheduler = Scheduler(1, 1, WEIGHTS)
+        await scheduler.acquire("holder", "interactive", far())
+        bulk = asyncio.ensure_future(scheduler.acquire("batch", "bulk", far()))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(scheduler.acquire("user", "interactive", far()))
+        await asyncio.sleep(0)
+        with pytest.raises(Shed, match="displaced"):
+            await bulk
+        scheduler.release(0.001)
+        await interactive
+        return scheduler
+
+    assert asyncio.run(main()).shed["queue_full"] == 1
+
+
+def test_sheds_calls_that_cannot_meet_their_deadline():
+    async def main():
+        scheduler = Scheduler(1, 10, WEIGHTS)
+        scheduler.service_time = 1.0
+        await scheduler.acquire("holder", "interactive", far())
+        with pytest.raises(Shed, match="deadline"):
+            await scheduler.acquire("user", "interactive", time.monotonic() + 0.5)
+        return scheduler
+
+    assert asyncio.run(main()).shed["deadline"] == 1
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        scheduler = Scheduler(1, 10, WEIGHTS)
+        await scheduler.acquire("holder", "interactive", far())
+        waiter = asyncio.ensure_future(scheduler.acquire("user", "interactive", far()))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release(0.001)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.active == 0
+    assert scheduler.depth() == 0
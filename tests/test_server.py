@@ -0,0 +1,343 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import server
+from budget import CreditLedger
+from cache import cache_key
+from keys import KeyPool
+from ratelimit import TokenBucket
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route Serper calls to a handler set by the test, with empty caches."""
+    routes = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return await routes["handler"](request)
+
+    monkeypatch.setattr(
+        server,
+        "_client",
+        httpx.AsyncClient(base_url=server.SERPER_BASE_URL, transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(server.response_cache, "_entries", type(server.response_cache._entries)())
+    monkeypatch.setattr(server.response_cache, "size", 0)
+
+    def use(fn):
+        routes["handler"] = fn
+
+    return use
+
+
+def organic(request: httpx.Request) -> dict:
+    payload = json.loads(request.content)
+    return {
+        "searchParameters": {"q": payload["q"], "num": payload["num"]},
+        "organic": [{"title": "t", "link": "l", "position": 1}],
+    }
+
+
+def store_expired(q: str, body: bytes) -> None:
+    """Put an already expired response for ``q`` in the memory cache."""
+    payload = server.normalizer.canonical(server.QueryPayload(q=q).upstream())
+    key = cache_key("search", {k: v for k, v in payload.items() if k != "num"})
+    server.response_cache.set(key, body, 60)
+    server.response_cache._entries[key] = (time.monotonic() - 1, body)
+
+
+def test_waiters_on_a_shared_fetch_keep_their_own_deadlines(upstream):
+    async def slow(request):
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(slow)
+
+    async def call(deadline):
+        start = time.monotonic()
+        payload = server.QueryPayload(q="shared", deadline=deadline)
+        result = await server.run_query("search", payload)
+        return result, time.monotonic() - start
+
+    async def main():
+        return await asyncio.gather(call(0.1), call(5))
+
+    (short, short_elapsed), (long, _) = asyncio.run(main())
+    assert short == {"error": "deadline exceeded"}
+    assert short_elapsed < 0.25
+    assert long["organic"][0]["title"] == "t"
+
+
+def test_repeated_query_is_served_from_the_cache(upstream):
+    calls = []
+
+    async def counted(request):
+        calls.append(1)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(counted)
+
+    async def main():
+        return [await server.run_query("search", server.QueryPayload(q="again")) for _ in range(2)]
+
+    first, second = asyncio.run(main())
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_non_json_body_is_not_cached(upstream):
+    calls = []
+
+    async def proxy_page(request):
+        calls.append(1)
+        return httpx.Response(200, text="<html>bad gateway</html>")
+
+    upstream(proxy_page)
+
+    async def main():
+        return [await server.run_query("search", server.QueryPayload(q="html")) for _ in range(2)]
+
+    results = asyncio.run(main())
+    assert all("invalid JSON" in r["error"] for r in results)
+    assert len(calls) == 2
+    assert server.response_cache.stats()["entries"] == 0
+
+
+def test_batch_search_reports_failures_per_item(monkeypatch):
+    async def flaky(endpoint, payload, raw=False):
+        if payload.q == "bad":
+            raise ValueError("boom")
+        return {"organic": [], "q": payload.q}
+
+    monkeypatch.setattr(server, "run_query", flaky)
+    content = asyncio.run(
+        server.app.call_tool("batch_search", {"queries": [{"q": "good"}, {"q": "bad"}]})
+    )
+    assert json.loads(content[0].text)["results"] == [
+        {"organic": [], "q": "good"},
+        {"error": "boom"},
+    ]
+
+
+def test_undecodable_cached_body_returns_an_error(upstream):
+    payload = server.normalizer.canonical(server.QueryPayload(q="broken").upstream())
+    key = cache_key("search", {k: v for k, v in payload.items() if k != "num"})
+    server.response_cache.set(key, b'{"searchParameters":{"num":10},', 60)
+    result = asyncio.run(server.run_query("search", server.QueryPayload(q="broken")))
+    assert "error" in result
+
+
+def test_passthrough_returns_the_upstream_bytes_untouched(upstream):
+    body = b'{"searchParameters": {"q": "raw", "num": 10}, "organic": []}'
+
+    async def verbatim(request):
+        return httpx.Response(200, content=body)
+
+    upstream(verbatim)
+    payload = server.QueryPayload(q="raw", sections=["*"], fields=["*"])
+    result = asyncio.run(server.run_query("search", payload, raw=True))
+    assert result.text == body.decode()
+
+    projected = server.QueryPayload(q="raw", sections=["organic"])
+    assert asyncio.run(server.run_query("search", projected, raw=True)) == {"organic": []}
+
+
+def test_rate_limited_call_falls_back_to_a_stale_entry(upstream, monkeypatch):
+    async def instant(request):
+        return httpx.Response(200, json=organic(request))
+
+    upstream(instant)
+    bucket = TokenBucket(0.1, 1, 1)
+    bucket.try_acquire()
+    monkeypatch.setitem(server.rate_limits, "search", bucket)
+    store_expired("limited", b'{"searchParameters": {"num": 10}, "organic": [{"title": "old"}]}')
+    result = asyncio.run(server.run_query("search", server.QueryPayload(q="limited")))
+    assert result["organic"] == [{"title": "old"}]
+    assert bucket.rejected == 1
+
+
+@pytest.fixture
+def busy_slot(monkeypatch):
+    """A one-slot scheduler whose slot is held by a call that usually takes 0.5s."""
+    scheduler = Scheduler(1, 10, server.SERPER_PRIORITY_WEIGHTS)
+    scheduler.service_time = 0.5
+    monkeypatch.setattr(server, "scheduler", scheduler)
+    return scheduler
+
+
+def test_short_deadline_behind_a_busy_slot_is_shed(upstream, busy_slot):
+    async def instant(request):
+        return httpx.Response(200, json=organic(request))
+
+    upstream(instant)
+
+    async def main():
+        await busy_slot.acquire("holder", "interactive", time.monotonic() + 10)
+        start = time.monotonic()
+        result = await server.run_query("search", server.QueryPayload(q="busy", deadline=0.2))
+        return result, time.monotonic() - start
+
+    result, elapsed = asyncio.run(main())
+    assert result["error"].startswith("shed: expected queue wait")
+    assert elapsed < 0.1
+    assert busy_slot.shed["deadline"] == 1
+
+
+def test_joiner_with_time_left_fetches_when_the_leader_is_shed(upstream, busy_slot):
+    async def instant(request):
+        return httpx.Response(200, json=organic(request))
+
+    upstream(instant)
+
+    async def main():
+        await busy_slot.acquire("holder", "interactive", time.monotonic() + 10)
+        asyncio.get_running_loop().call_later(0.2, busy_slot.release, 0.5)
+        return await asyncio.gather(
+            server.run_query("search", server.QueryPayload(q="joined", deadline=0.2)),
+            server.run_query("search", server.QueryPayload(q="joined", deadline=5)),
+        )
+
+    short, long = asyncio.run(main())
+    assert short["error"].startswith("shed")
+    assert long["organic"][0]["title"] == "t"
+
+
+def test_batch_item_past_its_deadline_falls_back_to_a_stale_entry(upstream, monkeypatch):
+    async def slow(request):
+        await asyncio.sleep(0.5)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(slow)
+    monkeypatch.setitem(server.SERPER_TOOL_DEADLINES, "batch_search", 0.1)
+    store_expired("old", b'{"searchParameters": {"num": 10}, "organic": [{"title": "old"}]}')
+    content = asyncio.run(
+        server.app.call_tool("batch_search", {"queries": [{"q": "old"}]})
+    )
+    assert json.loads(content[0].text)["results"][0]["organic"] == [{"title": "old"}]
+
+
+def test_smaller_fetch_does_not_replace_a_larger_cached_response(upstream):
+    async def by_num(request):
+        payload = json.loads(request.content)
+        await asyncio.sleep(0.1 if payload["num"] == 10 else 0)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(by_num)
+
+    async def main():
+        await asyncio.gather(
+            server.run_query("search", server.QueryPayload(q="sizes", num=10)),
+            server.run_query("search", server.QueryPayload(q="sizes", num=20)),
+        )
+
+    asyncio.run(main())
+    [(_, body)] = server.response_cache._entries.values()
+    assert json.loads(body)["searchParameters"]["num"] == 20
+
+
+@pytest.mark.parametrize(("hard", "fetches"), [(0, 1), (1, 0)])
+def test_revalidation_respects_the_callers_budget(upstream, monkeypatch, hard, fetches):
+    calls = []
+
+    async def counted(request):
+        calls.append(1)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(counted)
+    ledger = CreditLedger(3600, {"client": (0, hard)})
+    ledger.charge("anonymous", "direct", 1)
+    monkeypatch.setattr(server, "ledger", ledger)
+    monkeypatch.setattr(server.response_cache, "stale_ttl", 60)
+    store_expired("stale", b'{"searchParameters": {"num": 10}, "organic": [{"title": "old"}]}')
+
+    async def main():
+        result = await server.run_query("search", server.QueryPayload(q="stale"))
+        await asyncio.sleep(0.05)
+        return result
+
+    assert asyncio.run(main())["organic"] == [{"title": "old"}]
+    assert len(calls) == fetches
+
+
+def test_client_id_is_the_session_id_not_the_client_supplied_id(monkeypatch):
+    request = SimpleNamespace(headers={"mcp-session-id": "session-1"})
+    context = SimpleNamespace(client_id="spoofed", request_context=SimpleNamespace(request=request))
+    monkeypatch.setattr(server.app, "get_context", lambda: context)
+    assert server.app.client_id() == "session-1"
+
+
+def test_stale_hits_trigger_one_background_refresh(upstream, monkeypatch):
+    calls = []
+
+    async def fresh(request):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(fresh)
+    monkeypatch.setattr(server.response_cache, "stale_ttl", 60)
+    store_expired("swr", b'{"searchParameters": {"num": 10}, "organic": [{"title": "old"}]}')
+
+    async def main():
+        stale = [await server.run_query("search", server.QueryPayload(q="swr")) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        return stale, await server.run_query("search", server.QueryPayload(q="swr"))
+
+    stale, refreshed = asyncio.run(main())
+    assert all(r["organic"] == [{"title": "old"}] for r in stale)
+    assert refreshed["organic"][0]["title"] == "t"
+    assert len(calls) == 1
+
+
+def test_rejected_key_fails_over_to_the_next_one(upstream, monkeypatch):
+    async def by_key(request):
+        if request.headers["X-API-KEY"] == "revoked":
+            return httpx.Response(401, json={"message": "Unauthorized"})
+        return httpx.Response(200, json=organic(request))
+
+    upstream(by_key)
+    pool = KeyPool([("revoked", 1), ("valid", 1)])
+    monkeypatch.setattr(server, "key_pool", pool)
+    result = asyncio.run(server.run_query("search", server.QueryPayload(q="keys")))
+    assert result["organic"][0]["title"] == "t"
+    assert [(k["errors"], k["ejected"]) for k in pool.stats()] == [(1, True), (0, False)]
+
+
+def test_search_all_returns_the_verticals_that_answered(upstream):
+    async def by_vertical(request):
+        if request.url.path == "/news":
+            return httpx.Response(400, json={"message": "bad request"})
+        if request.url.path == "/images":
+            await asyncio.sleep(1)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(by_vertical)
+    start = time.monotonic()
+    content = asyncio.run(
+        server.app.call_tool("search_all", {"payload": {"q": "everything", "deadline": 0.2}})
+    )
+    results = json.loads(content[0].text)
+    assert time.monotonic() - start < 0.5
+    assert results["search"]["organic"][0]["title"] == "t"
+    assert "400" in results["news"]["error"]
+    assert results["images"] == {"error": "deadline exceeded"}
+
+
+def test_search_all_queries_each_vertical_once(upstream):
+    paths = []
+
+    async def recorded(request):
+        paths.append(request.url.path)
+        return httpx.Response(200, json=organic(request))
+
+    upstream(recorded)
+    arguments = {"payload": {"q": "twice"}, "verticals": ["news", "news", "search"]}
+    content = asyncio.run(server.app.call_tool("search_all", arguments))
+    assert list(json.loads(content[0].text)) == ["news", "search"]
+    assert sorted(paths) == ["/news", "/search"]
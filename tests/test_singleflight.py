@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    async def main():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "body"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(main())
+    assert results == ["body"] * 3
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "shared": 2, "abandoned": 0}
+
+
+def test_exception_reaches_every_waiter():
+    async def main():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        return await asyncio.gather(
+            flight.do("k", work), flight.do("k", work), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [ValueError, ValueError]
+
+
+def test_cancelled_waiter_leaves_shared_task_running():
+    async def main():
+        flight = SingleFlight()
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return "body"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return flight, finished, await second
+
+    flight, finished, result = asyncio.run(main())
+    assert result == "body"
+    assert finished == [1]
+    assert flight.abandoned == 0
+
+
+def test_last_waiter_leaving_cancels_shared_task():
+    async def main():
+        flight = SingleFlight()
+        cancelled = []
+
+        async def work():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        waiters = [asyncio.ensure_future(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flight, cancelled
+
+    flight, cancelled = asyncio.run(main())
+    assert cancelled == [1]
+    assert flight.abandoned == 1
+    assert flight.stats()["in_flight"] == 0
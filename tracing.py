@@ -0,0 +1,210 @@
+"""Lightweight tracing that exports OpenTelemetry-compatible spans.
+
+Spans are encoded as OTLP/JSON ``resourceSpans`` and either appended to a
+file (one export batch per line) or posted to an OTLP/HTTP collector such
+as ``http://localhost:4318/v1/traces``. Sampling is decided once per trace
+at the root span; unsampled traces only cost a context-variable lookup per
+stage.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Span:
+    __slots__ = (
+        "name", "kind", "trace_id", "span_id", "parent_id",
+        "start", "end", "attributes", "error", "mark",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str,
+        kind: int,
+        start: int | None = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = start or time.time_ns()
+        self.end = 0
+        self.attributes: dict = {}
+        self.error = ""
+        self.mark = 0
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class _NoopSpan:
+    recording = False
+
+    def set(self, key: str, value) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current: ContextVar[Span | None] = ContextVar("serper_span", default=None)
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def export(self, document: dict) -> None:
+        await asyncio.to_thread(self._write, json.dumps(document, separators=(",", ":")))
+
+
+class OTLPHttpExporter:
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def export(self, document: dict) -> None:
+        await self._client.post(self.endpoint, json=document)
+
+
+class Tracer:
+    """Creates spans, samples traces and batches finished spans for export."""
+
+    def __init__(
+        self,
+        service_name: str,
+        sample_rate: float,
+        exporter=None,
+        batch_size: int = 256,
+        flush_interval: float = 5.0,
+    ):
+        self.service_name = service_name
+        self.sample_rate = sample_rate if exporter is not None else 0.0
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.exported = 0
+        self.failed = 0
+        self._pending: list[Span] = []
+        self._last_flush = time.monotonic()
+        self._flushing: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def current(self):
+        return _current.get() or NOOP_SPAN
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, root: bool = False, **attributes):
+        """Open a child of the current span, or a sampled root when ``root`` is set."""
+        parent = _current.get()
+        if parent is None:
+            if not (root and self.enabled and random.random() < self.sample_rate):
+                yield NOOP_SPAN
+                return
+            span = Span(name, os.urandom(16).hex(), "", kind)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, kind)
+        span.attributes.update(attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            self.finish(span)
+
+    def record(self, name: str, start: int, end: int, **attributes) -> None:
+        """Add an already-timed child span of the current span."""
+        parent = _current.get()
+        if parent is None:
+            return
+        span = Span(name, parent.trace_id, parent.span_id, SPAN_KIND_INTERNAL, start)
+        span.attributes.update(attributes)
+        self.finish(span, end)
+
+    def finish(self, span: Span, end: int | None = None) -> None:
+        span.end = end or time.time_ns()
+        self._pending.append(span)
+        if (
+            len(self._pending) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            try:
+                task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                return
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def flush(self) -> None:
+        spans, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if not spans or self.exporter is None:
+            return
+        document = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {"scope": {"name": "serperdev-mcp"}, "spans": [s.to_otlp() for s in spans]}
+                    ],
+                }
+            ]
+        }
+        try:
+            await self.exporter.export(document)
+            self.exported += len(spans)
+        except Exception:
+            self.failed += len(spans)